@@ -84,7 +84,7 @@ class ApplicationAgent(Agent):
             
             status["professors"][str(prof.jid)] = {
                 "alive": prof.is_alive(),
-                "current_subject": subject.get_nombre() if subject else None,
+                "current_subject": subject.nombre if subject else None,
                 "pending_blocks": getattr(prof, "bloques_pendientes", 0),
                 "order": prof.orden
             }
@@ -113,8 +113,8 @@ class ApplicationAgent(Agent):
         await self.message_logger.start(self.scenario)
         
         # Initialize storage instances
-        self.prof_storage = await ProfesorScheduleStorage.get_instance()
-        self.room_storage = await SalaScheduleStorage.get_instance()
+        self.prof_storage = ProfesorScheduleStorage.instance()
+        self.room_storage = SalaScheduleStorage.get_instance()
         
         self.prof_storage.set_scenario(self.scenario)
         self.room_storage.set_scenario(self.scenario)
@@ -124,6 +124,8 @@ class ApplicationAgent(Agent):
         self.rtt_logger = await RTTLogger(self.scenario)
         await self.rtt_logger.start()
         
+        await self.factory.start()
+        
         # Add startup coordinator behavior
         startup_template = Template()
         startup_template.set_metadata("conversation-id", "startup-sequence")
@@ -210,7 +212,7 @@ class ApplicationAgent(Agent):
                     msg.set_metadata("conversation-id", "negotiation-start-base")
                     msg.body = "START"
                     
-                    await self.agent.message_logger.log_message_sent(
+                    self.agent.message_logger.log_message_sent(
                         first_prof.representative_name, msg
                     )
                     
@@ -531,6 +533,8 @@ class ApplicationRunner:
         if cleanup_tasks:
             await asyncio.gather(*cleanup_tasks)
         
+        await self.app_agent.factory.stop()
+        
         print("Platform shutdown complete.")
 
 def main():
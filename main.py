@@ -77,7 +77,7 @@ class ApplicationAgent(Agent):
             
             status["professors"][str(prof.jid)] = {
                 "alive": prof.is_alive(),
-                "current_subject": subject.get_nombre() if subject else None,
+                "current_subject": subject.nombre if subject else None,
                 "pending_blocks": getattr(prof, "bloques_pendientes", 0),
                 "order": prof.orden
             }
@@ -102,8 +102,8 @@ class ApplicationAgent(Agent):
         self._kb = await AgentKnowledgeBase.get_instance()
         
         # Initialize storage instances
-        self.prof_storage = await ProfesorScheduleStorage.get_instance()
-        self.room_storage = await SalaScheduleStorage.get_instance()
+        self.prof_storage = ProfesorScheduleStorage.instance()
+        self.room_storage = SalaScheduleStorage.get_instance()
         
         # Add startup coordinator behavior
         startup_template = Template()
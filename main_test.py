@@ -14,10 +14,22 @@ from src.objects.static.agent_enums import Day, Actividad, TipoContrato
 from src.objects.knowledge_base import AgentKnowledgeBase, AgentCapability
 from src.behaviours.fsm_negotiation_states import NegotiationFSM, NegotiationStates
 from src.fipa.acl_message import FIPAPerformatives
+from src.json_stuff.json_salas import SalaScheduleStorage
+from src.performance.metrics_monitor import ActionsMonitor
+from src.performance.agent_factory import AgentFactory
+from src.performance.agent_message_logger import AgentMessageLogger
+from src.objects.helper.quick_rejector import RoomQuickRejectFilter
+from src.objects.helper.batch_requests import AssignmentRequest, BatchAssignmentRequest
+from src.objects.helper.classroom_availability import ClassroomAvailability
+import aiofiles
 import json
-import jsonpickle
+import math
+import msgspec
+import numpy as np
+import tempfile
+from pathlib import Path
 
-class BaseTestCase(unittest.TestCase):
+class BaseTestCase(unittest.IsolatedAsyncioTestCase):
     """Base test case for SPADE agents with common setup and teardown"""
     
     async def asyncSetUp(self):
@@ -40,6 +52,42 @@ class BaseTestCase(unittest.TestCase):
                     await task
                 except asyncio.CancelledError:
                     pass
+
+    @staticmethod
+    def mock_loggers(agent):
+        """Replace the agent's message and RTT loggers, which are normally set by the runner"""
+        agent.message_logger = MagicMock()
+        agent.rtt_logger = MagicMock()
+        agent.rtt_logger.start_request = AsyncMock()
+        agent.rtt_logger.end_request = AsyncMock()
+        agent.rtt_logger.record_message_sent = AsyncMock()
+        return agent.rtt_logger
+
+    @staticmethod
+    def cfp_body(nombre="Algebra", vacantes=25):
+        return json.dumps({
+            "nombre": nombre,
+            "vacantes": vacantes,
+            "nivel": 3,
+            "campus": "Kaufmann",
+            "bloques_pendientes": 2,
+            "sala_asignada": "",
+            "ultimo_dia": "",
+            "ultimo_bloque": -1
+        })
+
+    @staticmethod
+    def assignment_body(day=Day.LUNES, block=1, subject_name="Algebra"):
+        assignment_req = AssignmentRequest(
+            day=day,
+            block=block,
+            subject_name=subject_name,
+            satisfaction=8,
+            classroom_code="A101",
+            vacancy=25,
+            prof_name="Dr. Smith"
+        )
+        return msgspec.json.encode(BatchAssignmentRequest([assignment_req])).decode("utf-8")
                 
 class AgenteSalaTest(BaseTestCase):
     """Tests for the Sala Agent"""
@@ -58,6 +106,7 @@ class AgenteSalaTest(BaseTestCase):
             turno=1
         )
         self.sala.set_knowledge_base(self.kb)
+        self.mock_loggers(self.sala)
         
         # Mock the storage
         self.storage_mock = MagicMock()
@@ -67,13 +116,13 @@ class AgenteSalaTest(BaseTestCase):
         # Initialize schedule
         self.sala.initialize_schedule()
         
-        # Access the responder behavior directly
+        # Access the responder behavior directly, setup() would attach it to the agent
         self.responder = self.sala.responder_behaviour
+        self.responder.set_agent(self.sala)
         # Mock RTT logger
-        self.responder.rtt_logger = MagicMock()
-        self.responder.rtt_logger.start_request = AsyncMock()
-        self.responder.rtt_logger.end_request = AsyncMock()
+        self.responder.rtt_logger = self.sala.rtt_logger
         self.responder.rtt_initialized = True
+        self.responder.send = AsyncMock()
         
     async def test_sala_initialization(self):
         """Test that the sala agent initializes correctly"""
@@ -95,40 +144,25 @@ class AgenteSalaTest(BaseTestCase):
         )
         cfp_msg.set_metadata("performative", FIPAPerformatives.CFP)
         cfp_msg.set_metadata("conversation-id", "test-conversation")
-        
-        # Create request body
-        request_data = {
-            "nombre": "Algebra",
-            "vacantes": 25,
-            "nivel": 3,
-            "campus": "Kaufmann",
-            "bloques_pendientes": 2,
-            "sala_asignada": "",
-            "ultimo_dia": "",
-            "ultimo_bloque": -1
-        }
-        cfp_msg.body = json.dumps(request_data)
+        cfp_msg.set_metadata("rtt-id", "rtt1")
+        cfp_msg.body = self.cfp_body()
         
         # Process the request
         await self.responder.process_request(cfp_msg)
         
+        # Verify a proposal offering every free block was sent
+        self.responder.send.assert_awaited_once()
+        propose_msg = self.responder.send.call_args[0][0]
+        self.assertEqual(propose_msg.get_metadata("performative"), FIPAPerformatives.PROPOSE)
+        availability = json.loads(propose_msg.body)
+        self.assertEqual(availability["codigo"], "A101")
+        self.assertEqual(availability["available_blocks"], {day.name: list(range(1, 10)) for day in Day})
+        
         # Verify the RTT logger was called
-        self.responder.rtt_logger.end_request.assert_called_once()
+        self.responder.rtt_logger.record_message_sent.assert_awaited_once()
         
     async def test_confirm_assignment(self):
         """Test confirming an assignment"""
-        # Create assignment request
-        from objects.helper.batch_requests import AssignmentRequest, BatchAssignmentRequest
-        assignment_req = AssignmentRequest(
-            day=Day.LUNES,
-            block=1,
-            subject_name="Algebra",
-            satisfaction=8,
-            classroom_code="A101",
-            vacancy=25
-        )
-        batch_req = BatchAssignmentRequest([assignment_req])
-        
         # Create mock message
         msg = Message(
             to="sala1@localhost",
@@ -136,10 +170,7 @@ class AgenteSalaTest(BaseTestCase):
         )
         msg.set_metadata("performative", FIPAPerformatives.ACCEPT_PROPOSAL)
         msg.set_metadata("conversation-id", "test-conversation")
-        msg.body = jsonpickle.encode(batch_req)
-        
-        # Mock the send method
-        self.responder.send = AsyncMock()
+        msg.body = self.assignment_body()
         
         # Confirm the assignment
         await self.responder.confirm_assignment(msg)
@@ -150,9 +181,11 @@ class AgenteSalaTest(BaseTestCase):
         
         # Verify response was sent
         self.responder.send.assert_called_once()
+        confirm_msg = self.responder.send.call_args[0][0]
+        self.assertEqual(confirm_msg.get_metadata("performative"), FIPAPerformatives.INFORM)
         
-        # Verify storage was updated
-        self.storage_mock.update_schedule.assert_called_once()
+        # Room schedules are only written out by the supervisor once negotiations end
+        self.storage_mock.update_schedule.assert_not_called()
 
 class AgenteSalaIntegrationTest(BaseTestCase):
     """Integration tests for the Sala Agent"""
@@ -171,6 +204,7 @@ class AgenteSalaIntegrationTest(BaseTestCase):
             turno=1
         )
         self.sala.set_knowledge_base(self.kb)
+        self.mock_loggers(self.sala)
         
         # Mock the storage
         self.storage_mock = MagicMock()
@@ -183,9 +217,7 @@ class AgenteSalaIntegrationTest(BaseTestCase):
         # Access the responder behavior directly
         self.responder = self.sala.responder_behaviour
         # Add mocks to the responder
-        self.responder.rtt_logger = MagicMock()
-        self.responder.rtt_logger.start_request = AsyncMock()
-        self.responder.rtt_logger.end_request = AsyncMock()
+        self.responder.rtt_logger = self.sala.rtt_logger
         self.responder.rtt_initialized = True
         self.responder.send = AsyncMock()
         self.responder.receive = AsyncMock(return_value=None)
@@ -199,18 +231,8 @@ class AgenteSalaIntegrationTest(BaseTestCase):
         )
         cfp_msg.set_metadata("performative", FIPAPerformatives.CFP)
         cfp_msg.set_metadata("conversation-id", "test-negotiation")
-        
-        request_data = {
-            "nombre": "Algebra",
-            "vacantes": 25,
-            "nivel": 3,
-            "campus": "Kaufmann",
-            "bloques_pendientes": 2,
-            "sala_asignada": "",
-            "ultimo_dia": "",
-            "ultimo_bloque": -1
-        }
-        cfp_msg.body = json.dumps(request_data)
+        cfp_msg.set_metadata("rtt-id", "rtt1")
+        cfp_msg.body = self.cfp_body()
         
         # Setup receive to return our message
         self.responder.receive.return_value = cfp_msg
@@ -225,24 +247,13 @@ class AgenteSalaIntegrationTest(BaseTestCase):
         self.assertEqual(propose_msg.get_metadata("performative"), FIPAPerformatives.PROPOSE)
         
         # 2. Create and process an ACCEPT_PROPOSAL message
-        from objects.helper.batch_requests import AssignmentRequest, BatchAssignmentRequest
-        assignment_req = AssignmentRequest(
-            day=Day.LUNES,
-            block=1,
-            subject_name="Algebra",
-            satisfaction=8,
-            classroom_code="A101",
-            vacancy=25
-        )
-        batch_req = BatchAssignmentRequest([assignment_req])
-        
         accept_msg = Message(
             to="sala1@localhost",
             sender="profesor1@localhost"
         )
         accept_msg.set_metadata("performative", FIPAPerformatives.ACCEPT_PROPOSAL)
         accept_msg.set_metadata("conversation-id", "test-negotiation")
-        accept_msg.body = jsonpickle.encode(batch_req)
+        accept_msg.body = self.assignment_body()
         
         # Reset mocks for next message
         self.responder.send.reset_mock()
@@ -260,8 +271,8 @@ class AgenteSalaIntegrationTest(BaseTestCase):
         # Verify the schedule was updated
         self.assertIsNotNone(self.sala.horario_ocupado[Day.LUNES][0])
         
-        # Verify storage was updated
-        self.storage_mock.update_schedule.assert_called_once()
+        # Both messages went through the message logger
+        self.assertEqual(self.sala.message_logger.log_message_received.call_count, 2)
 
 class AgentProfesorTest(BaseTestCase):
     """Tests for the Profesor Agent"""
@@ -309,8 +320,7 @@ class AgentProfesorTest(BaseTestCase):
         self.storage_mock.update_schedule = AsyncMock()
         self.profesor.set_storage(self.storage_mock)
         
-        # Initialize the agent
-        self.profesor._initialize_data_structures()
+        # The constructor already built the data structures and converted the asignaturas
         
         # Create mock negotiation state
         self.fsm_mock = MagicMock(spec=NegotiationFSM)
@@ -334,24 +344,24 @@ class AgentProfesorTest(BaseTestCase):
         """Test getting the current subject"""
         current = self.profesor.get_current_subject()
         self.assertIsNotNone(current)
-        self.assertEqual(current.get_nombre(), "Algebra")
-        self.assertEqual(current.get_codigo_asignatura(), "MAT101")
-        self.assertEqual(current.get_horas(), 4)
+        self.assertEqual(current.nombre, "Algebra")
+        self.assertEqual(current.codigo_asignatura, "MAT101")
+        self.assertEqual(current.horas, 4)
         
     async def test_move_to_next_subject(self):
         """Test moving to the next subject"""
         # Verify initial state
         self.assertEqual(self.profesor.asignatura_actual, 0)
         current = self.profesor.get_current_subject()
-        self.assertEqual(current.get_nombre(), "Algebra")
+        self.assertEqual(current.nombre, "Algebra")
         
         # Move to next subject
-        await self.profesor.move_to_next_subject()
+        self.profesor.move_to_next_subject()
         
         # Verify new state
         self.assertEqual(self.profesor.asignatura_actual, 1)
         current = self.profesor.get_current_subject()
-        self.assertEqual(current.get_nombre(), "Programacion")
+        self.assertEqual(current.nombre, "Programacion")
         
     async def test_update_schedule_info(self):
         """Test updating schedule information"""
@@ -370,9 +380,8 @@ class AgentProfesorTest(BaseTestCase):
         # Verify storage was updated
         self.storage_mock.update_schedule.assert_called_once()
         
-        # Get block info
-        bloque_info = self.profesor.get_bloque_info(Day.LUNES, 1)
-        self.assertIsNotNone(bloque_info)
+        # The block is tracked under the current subject instance
+        self.assertEqual(self.profesor.get_blocks_by_day(Day.LUNES), {"Algebra-MAT101-0": [1]})
         
     async def test_is_block_available(self):
         """Test checking if a block is available"""
@@ -425,35 +434,23 @@ class FSMNegotiationTest(BaseTestCase):
             orden=1
         )
         self.profesor.set_knowledge_base(self.kb)
+        self.mock_loggers(self.profesor)
         
         # Mock the storage
         self.storage_mock = MagicMock()
         self.storage_mock.update_schedule = AsyncMock()
         self.profesor.set_storage(self.storage_mock)
         
-        # Initialize the agent
-        self.profesor._initialize_data_structures()
-        
         # Create the FSM
         self.fsm = NegotiationFSM(self.profesor)
+        self.profesor.negotiation_state_behaviour = self.fsm
         
-        # Get access to the states
-        self.setup_state = self.fsm._setup_state_factory()
-        self.collecting_state = self.fsm._collecting_state_factory()
-        self.evaluating_state = self.fsm._evaluating_state_factory()
-        
-        # Mock RTT logger
-        self.setup_state.rtt_logger = MagicMock()
-        self.setup_state.rtt_logger.start_request = AsyncMock()
-        self.setup_state.rtt_initialized = True
-        
-        self.collecting_state.rtt_logger = MagicMock()
-        self.collecting_state.rtt_logger.end_request = AsyncMock()
-        
-        self.evaluating_state.rtt_logger = MagicMock()
-        self.evaluating_state.rtt_logger.start_request = AsyncMock()
-        self.evaluating_state.rtt_logger.end_request = AsyncMock()
-        self.evaluating_state.rtt_initialized = True
+        # Get access to the states, the FSM only binds them to the agent while running them
+        self.setup_state = self.fsm.get_state(NegotiationStates.SETUP)
+        self.collecting_state = self.fsm.get_state(NegotiationStates.COLLECTING)
+        self.evaluating_state = self.fsm.get_state(NegotiationStates.EVALUATING)
+        for state in (self.setup_state, self.collecting_state, self.evaluating_state):
+            state.set_agent(self.profesor)
         
         # Mock external methods
         self.setup_state.send = AsyncMock()
@@ -465,13 +462,16 @@ class FSMNegotiationTest(BaseTestCase):
     async def test_fsm_setup_state(self):
         """Test the setup state"""
         # Mock the send_cfp_messages method
-        self.setup_state.send_cfp_messages = AsyncMock(return_value=5)  # 5 CFPs sent
+        async def send_cfp_messages():
+            self.fsm.cfp_count = 5  # 5 CFPs sent
+            return 5
+        self.setup_state.send_cfp_messages = AsyncMock(side_effect=send_cfp_messages)
         
         # Run the setup state
         await self.setup_state.run()
         
         # Verify state transition
-        self.assertEqual(self.setup_state._next_state, NegotiationStates.COLLECTING)
+        self.assertEqual(self.setup_state.next_state, NegotiationStates.COLLECTING)
         
         # Verify FSM state values
         self.assertEqual(self.fsm.bloques_pendientes, 4)  # From Algebra's horas
@@ -481,19 +481,18 @@ class FSMNegotiationTest(BaseTestCase):
         """Test the collecting state"""
         # Setup FSM state
         self.fsm.bloques_pendientes = 4
-        self.fsm.cfp_count = 3
-        self.fsm.expected_rooms = {"room1@localhost", "room2@localhost", "room3@localhost"}
+        self.fsm.cfp_count = 1
+        self.fsm.timeout = NegotiationFSM.BASE_TIMEOUT
         
         # Create mock proposals
-        from objects.helper.batch_proposals import ClassroomAvailability
+        from objects.helper.classroom_availability import ClassroomAvailability
         
         # Setup receive to return a proposal
         proposal_msg = Message(
             to="profesor1@localhost",
             sender="room1@localhost"
         )
-        proposal_msg.id = "msg1"
-        proposal_msg.set_metadata("performative", "propose")
+        proposal_msg.set_metadata("performative", FIPAPerformatives.PROPOSE)
         proposal_msg.set_metadata("conversation-id", "test-conv")
         proposal_msg.set_metadata("rtt-id", "rtt1")
         
@@ -503,7 +502,7 @@ class FSMNegotiationTest(BaseTestCase):
             capacidad=30,
             available_blocks={"LUNES": [1, 2, 3]}
         )
-        proposal_msg.body = jsonpickle.encode(availability)
+        proposal_msg.body = msgspec.json.encode(availability).decode("utf-8")
         
         # Mock receive to return our message once, then None
         self.collecting_state.receive = AsyncMock(side_effect=[proposal_msg, None])
@@ -512,11 +511,15 @@ class FSMNegotiationTest(BaseTestCase):
         await self.collecting_state.run()
         
         # Verify state transition
-        self.assertEqual(self.collecting_state._next_state, NegotiationStates.EVALUATING)
+        self.assertEqual(self.collecting_state.next_state, NegotiationStates.EVALUATING)
         
         # Verify proposal was processed
-        self.assertEqual(self.fsm.responding_rooms, {"room1@localhost"})
+        self.assertEqual(self.fsm.received_proposals, 1)
         self.assertFalse(self.fsm.proposals.empty())
+        proposal = self.fsm.proposals.get_nowait()
+        self.assertEqual(proposal.room_code, "A101")
+        self.assertEqual([b.block for b in proposal.day_proposals[Day.LUNES]], [1, 2, 3])
+        self.profesor.rtt_logger.end_request.assert_awaited_once()
         
     async def test_fsm_evaluating_state(self):
         """Test the evaluating state"""
@@ -524,7 +527,8 @@ class FSMNegotiationTest(BaseTestCase):
         self.fsm.bloques_pendientes = 4
         
         # Add a mock proposal to the queue
-        from objects.helper.batch_proposals import BatchProposal, ClassroomAvailability
+        from objects.helper.batch_proposals import BatchProposal
+        from objects.helper.classroom_availability import ClassroomAvailability
         
         availability = ClassroomAvailability(
             codigo="A101",
@@ -539,25 +543,28 @@ class FSMNegotiationTest(BaseTestCase):
         )
         msg.set_metadata("conversation-id", "test-conv")
         
-        proposal = BatchProposal(availability, msg)
+        proposal = BatchProposal.from_availability(availability, msg)
         await self.fsm.proposals.put(proposal)
         
         # Mock the evaluator
-        self.evaluating_state.evaluator.filter_and_sort_proposals = AsyncMock(
+        self.evaluating_state.evaluator.filter_and_sort_proposals = MagicMock(
             return_value=[proposal]
         )
         
         # Mock try_assign_batch_proposals to return True
         self.evaluating_state.try_assign_batch_proposals = AsyncMock(return_value=True)
+        self.evaluating_state.send_cfp_messages = AsyncMock(return_value=1)
         
         # Run the evaluating state
         await self.evaluating_state.run()
         
         # Verify proposal was processed
+        self.evaluating_state.evaluator.filter_and_sort_proposals.assert_called_once_with([proposal])
         self.evaluating_state.try_assign_batch_proposals.assert_called_once()
         
         # Verify state transition (should be COLLECTING for remaining blocks)
-        self.assertEqual(self.evaluating_state._next_state, NegotiationStates.COLLECTING)
+        self.evaluating_state.send_cfp_messages.assert_awaited_once()
+        self.assertEqual(self.evaluating_state.next_state, NegotiationStates.COLLECTING)
 
 class EndToEndTest(BaseTestCase):
     """End-to-end tests simulating a full negotiation"""
@@ -576,6 +583,7 @@ class EndToEndTest(BaseTestCase):
             turno=1
         )
         self.sala.set_knowledge_base(self.kb)
+        self.mock_loggers(self.sala)
         
         # Create a professor agent
         self.asignaturas = [
@@ -599,6 +607,7 @@ class EndToEndTest(BaseTestCase):
             orden=1
         )
         self.profesor.set_knowledge_base(self.kb)
+        self.mock_loggers(self.profesor)
         
         # Mock storages
         self.sala_storage = MagicMock()
@@ -613,6 +622,11 @@ class EndToEndTest(BaseTestCase):
         await self.sala.setup()
         await self.profesor.setup()
         
+        # The room answers through its responder, wired to our mocks
+        self.responder = self.sala.responder_behaviour
+        self.responder.rtt_logger = self.sala.rtt_logger
+        self.responder.send = AsyncMock()
+        
         # Setup KB to return our sala when searched
         sala_capability = AgentCapability(
             service_type="sala",
@@ -630,100 +644,423 @@ class EndToEndTest(BaseTestCase):
         sala_info.capabilities = [sala_capability]
         
         self.kb.search = AsyncMock(return_value=[sala_info])
+
+    async def room_reply(self, msg: Message) -> Message:
+        """Deliver a professor message to the room and return the room's answer"""
+        msg.sender = str(self.profesor.jid)
+        self.responder.send.reset_mock()
+        if msg.get_metadata("performative") == FIPAPerformatives.CFP:
+            await self.responder.process_request(msg)
+        else:
+            await self.responder.confirm_assignment(msg)
+        self.responder.send.assert_awaited_once()
+        return self.responder.send.call_args[0][0]
         
     async def test_end_to_end_single_assignment(self):
         """Test a complete end-to-end assignment process"""
         # 1. Start the FSM
         fsm = NegotiationFSM(self.profesor)
         self.profesor.negotiation_state_behaviour = fsm
-        
-        # No need to mock RTT logger for end-to-end
-        fsm._setup_state_factory()
+        states = fsm.get_states()
+        for state in states.values():
+            state.set_agent(self.profesor)
         
         # Run the FSM manually through each state
         # SETUP: Will send CFPs
         # Mock the send method to capture the message
-        with patch.object(fsm._states[NegotiationStates.SETUP], 'send', new_callable=AsyncMock) as mock_send:
-            await fsm._states[NegotiationStates.SETUP].run()
+        with patch.object(states[NegotiationStates.SETUP], 'send', new_callable=AsyncMock) as mock_send:
+            await states[NegotiationStates.SETUP].run()
             
             # Verify a CFP was sent
             self.assertTrue(mock_send.called)
             cfp_msg = mock_send.call_args[0][0]
             self.assertEqual(cfp_msg.get_metadata("performative"), FIPAPerformatives.CFP)
+        self.assertEqual(states[NegotiationStates.SETUP].next_state, NegotiationStates.COLLECTING)
         
-        # COLLECTING: Will receive proposals
-        # Create a proposal message
-        from objects.helper.batch_proposals import ClassroomAvailability
-        
-        proposal_msg = Message(
-            to="profesor1@localhost",
-            sender="sala1@localhost"
-        )
-        proposal_msg.id = "msg1"
-        proposal_msg.set_metadata("performative", "propose")
-        proposal_msg.set_metadata("conversation-id", fsm.bloques_pendientes)
-        proposal_msg.set_metadata("rtt-id", "rtt1")
-        proposal_msg.set_metadata("ontology", "classroom-availability")
-        
-        availability = ClassroomAvailability(
-            codigo="A101",
-            campus="Kaufmann",
-            capacidad=30,
-            available_blocks={"LUNES": [1, 2, 3]}
-        )
-        proposal_msg.body = jsonpickle.encode(availability)
+        # COLLECTING: Will receive the room's proposal
+        proposal_msg = await self.room_reply(cfp_msg)
+        self.assertEqual(proposal_msg.get_metadata("performative"), FIPAPerformatives.PROPOSE)
         
         # Mock receive to return our proposal
-        with patch.object(fsm._states[NegotiationStates.COLLECTING], 'receive', 
+        with patch.object(states[NegotiationStates.COLLECTING], 'receive', 
                         new_callable=AsyncMock, return_value=proposal_msg):
-            await fsm._states[NegotiationStates.COLLECTING].run()
+            await states[NegotiationStates.COLLECTING].run()
             
             # Verify the proposal was added to the queue
             self.assertFalse(fsm.proposals.empty())
+        self.assertEqual(states[NegotiationStates.COLLECTING].next_state, NegotiationStates.EVALUATING)
         
-        # EVALUATING: Will send assignment requests
-        # Mock send to capture the assignment message
-        with patch.object(fsm._states[NegotiationStates.EVALUATING], 'send', 
-                        new_callable=AsyncMock) as mock_send:
-            
-            # Also need to mock receive for the confirmation
-            from objects.helper.confirmed_assignments import BatchAssignmentConfirmation, ConfirmedAssignment
-            
-            confirmation = BatchAssignmentConfirmation([
-                ConfirmedAssignment(
-                    day=Day.LUNES,
-                    block=1,
-                    classroom_code="A101",
-                    satisfaction=8
-                )
-            ])
-            
-            confirm_msg = Message(
-                to="profesor1@localhost",
-                sender="sala1@localhost"
-            )
-            confirm_msg.set_metadata("performative", FIPAPerformatives.INFORM)
-            confirm_msg.set_metadata("conversation-id", fsm.bloques_pendientes)
-            confirm_msg.set_metadata("ontology", "room-assignment")
-            confirm_msg.body = jsonpickle.encode(confirmation)
+        # EVALUATING: Will send assignment requests, the room's confirmation comes back through receive
+        replies = []
+
+        async def send_to_room(msg):
+            self.assertEqual(msg.get_metadata("performative"), FIPAPerformatives.ACCEPT_PROPOSAL)
+            replies.append(await self.room_reply(msg))
+
+        async def receive_from_room(timeout=None):
+            return replies.pop(0) if replies else None
+
+        evaluating = states[NegotiationStates.EVALUATING]
+        with patch.object(evaluating, 'send', new_callable=AsyncMock, side_effect=send_to_room) as mock_send, \
+                patch.object(evaluating, 'receive', new_callable=AsyncMock, side_effect=receive_from_room):
+            # Run the evaluating state
+            await evaluating.run()
             
-            with patch.object(fsm._states[NegotiationStates.EVALUATING], 'receive', 
-                            new_callable=AsyncMock, return_value=confirm_msg):
-                
-                # Run the evaluating state
-                await fsm._states[NegotiationStates.EVALUATING].run()
-                
-                # Verify an assignment request was sent
-                self.assertTrue(mock_send.called)
-                assign_msg = mock_send.call_args[0][0]
-                self.assertEqual(assign_msg.get_metadata("performative"), 
-                                FIPAPerformatives.ACCEPT_PROPOSAL)
-                
-                # Verify the profesor's schedule was updated
-                self.assertIn(1, self.profesor.horario_ocupado[Day.LUNES])
-                
-                # Verify bloques_pendientes was decremented
-                self.assertEqual(fsm.bloques_pendientes, 1)  # Started with 2
+            # Verify an assignment request was sent
+            self.assertTrue(mock_send.called)
+        
+        # Both blocks were confirmed, so the professor moves on to its next subject
+        self.assertEqual(fsm.bloques_pendientes, 0)  # Started with 2
+        self.assertEqual(evaluating.next_state, NegotiationStates.SETUP)
+        self.assertIsNone(self.profesor.get_current_subject())
+        
+        # Verify the professor's and the room's schedules agree
+        prof_blocks = {(day, block) for day, blocks in self.profesor.horario_ocupado.items() for block in blocks}
+        room_blocks = {
+            (day, idx + 1)
+            for day, assignments in self.sala.horario_ocupado.items()
+            for idx, assignment in enumerate(assignments) if assignment is not None
+        }
+        self.assertEqual(len(prof_blocks), 2)
+        self.assertEqual(prof_blocks, room_blocks)
+        self.assertEqual(self.prof_storage.update_schedule.await_count, 2)
+
+class QuickRejectFilterTest(unittest.TestCase):
+    """The vectorized room filter against the original per-room rule"""
+
+    @staticmethod
+    def original_rule(subject_campus, vacancies, room_campus, capacity):
+        if room_campus != subject_campus:
+            return True
+        needs_meeting_room = vacancies < RoomQuickRejectFilter.MEETING_ROOM_THRESHOLD
+        is_meeting_room = capacity < RoomQuickRejectFilter.MEETING_ROOM_THRESHOLD
+        if needs_meeting_room != is_meeting_room:
+            return True
+        if is_meeting_room:
+            return capacity < math.ceil(vacancies * 0.8)
+        return capacity < vacancies
+
+    def test_filter_rooms_matches_original_rule(self):
+        """Covers the (4v + 4) // 5 meeting-room floor around the threshold"""
+        room_filter = RoomQuickRejectFilter()
+        rooms = [(campus, capacity) for campus in ("Kaufmann", "Chillan") for capacity in range(0, 60)]
+        campus_ids, capacities = room_filter.pack_rooms(rooms)
+        for vacancies in range(0, 60):
+            subject = MagicMock(vacantes=vacancies, campus="Kaufmann", codigo_asignatura="MAT101")
+            ctx = room_filter.build_subject_ctx(subject)
+            expected = [self.original_rule("Kaufmann", vacancies, c, cap) for c, cap in rooms]
+            with self.subTest(vacancies=vacancies):
+                self.assertEqual(room_filter.filter_rooms(ctx, campus_ids, capacities).tolist(), expected)
+                self.assertEqual([room_filter.can_quick_reject_ctx(ctx, c, cap) for c, cap in rooms], expected)
+
+    def test_pack_rooms_truncates_float_capacities(self):
+        """Capacities are packed as int32, which can't change the outcome for integer vacancies"""
+        room_filter = RoomQuickRejectFilter()
+        rooms = [("Kaufmann", capacity) for capacity in (7.5, 8.0, 9.99, 10.0, 24.9, 25.0, 25.5, 30.2)]
+        campus_ids, capacities = room_filter.pack_rooms(rooms)
+        self.assertEqual(capacities.dtype, np.int32)
+        self.assertEqual(capacities.tolist(), [7, 8, 9, 10, 24, 25, 25, 30])
+        for vacancies in (8, 9, 10, 25, 26):
+            subject = MagicMock(vacantes=vacancies, campus="Kaufmann", codigo_asignatura="MAT101")
+            ctx = room_filter.build_subject_ctx(subject)
+            expected = [self.original_rule("Kaufmann", vacancies, c, cap) for c, cap in rooms]
+            with self.subTest(vacancies=vacancies):
+                self.assertEqual(room_filter.filter_rooms(ctx, campus_ids, capacities).tolist(), expected)
+
+class WireFormatTest(unittest.TestCase):
+    """Message bodies and files written through msgspec"""
+
+    def test_assignment_request_professor_field(self):
+        """prof_name goes on the wire as "professor", like the old to_dict did"""
+        request = AssignmentRequest(
+            day=Day.LUNES, block=1, subject_name="Algebra", satisfaction=8,
+            classroom_code="A101", vacancy=25, prof_name="Dr. Smith"
+        )
+        wire = json.loads(msgspec.json.encode(BatchAssignmentRequest([request])))
+        self.assertEqual(wire["assignments"][0]["professor"], "Dr. Smith")
+        self.assertNotIn("prof_name", wire["assignments"][0])
+        self.assertEqual(request.to_dict()["professor"], "Dr. Smith")
+
+        decoded = msgspec.json.decode(json.dumps(wire), type=BatchAssignmentRequest)
+        self.assertEqual(decoded.assignments[0], request)
+        self.assertEqual(AssignmentRequest.from_dict(wire["assignments"][0]), request)
+
+    def test_classroom_availability_file_round_trip(self):
+        """save_to_file writes msgpack that load_from_file reads back"""
+        availability = ClassroomAvailability(
+            codigo="A101",
+            campus="Kaufmann",
+            capacidad=30,
+            available_blocks={"LUNES": [1, 2, 3], "MARTES": [9]}
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "availability.msgpack"
+            availability.save_to_file(str(path))
+            self.assertEqual(msgspec.msgpack.decode(path.read_bytes())["codigo"], "A101")
+            self.assertEqual(ClassroomAvailability.load_from_file(str(path)), availability)
+
+class MessageLoggerTest(unittest.IsolatedAsyncioTestCase):
+    """Bounded message log queue"""
+
+    async def asyncSetUp(self):
+        # Built directly, the AsyncioSingleton would share one logger across every test
+        self.logger = AgentMessageLogger.__new__(AgentMessageLogger)
+        with patch.object(AgentMessageLogger, "QUEUE_SIZE", 3):
+            self.logger.__init__()
+        self.logger._is_running = True
+
+    @staticmethod
+    def message(n):
+        msg = Message(to="sala1@localhost", sender="profesor1@localhost", body=f"body {n}")
+        msg.set_metadata("performative", FIPAPerformatives.CFP)
+        return msg
+
+    async def test_full_queue_drops_and_counts(self):
+        """Entries past QUEUE_SIZE are dropped and counted instead of growing the queue"""
+        for n in range(5):
+            self.logger.log_message_sent("Profesor1", self.message(n))
+
+        self.assertEqual(self.logger._log_queue.qsize(), 3)
+        self.assertEqual(self.logger._drops, 2)
+        queued = [self.logger._log_queue.get_nowait() for _ in range(3)]
+        self.assertEqual([entry.content for entry in queued], ["body 0", "body 1", "body 2"])
+        self.assertEqual([entry.sequence_id for entry in queued], [1, 2, 3])
+
+    async def test_stop_writes_queued_entries(self):
+        """The writer drains what was queued before stop() closes the file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "messages.csv"
+            self.logger._fh = await aiofiles.open(path, "wb")
+            self.logger._writer_task = asyncio.create_task(self.logger._background_writer())
+            for n in range(3):
+                self.logger.log_message_received("Sala1", self.message(n))
+            await self.logger.stop()
+
+            rows = path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(all(",RECEIVE,profesor1@localhost,Sala1," in row for row in rows))
+        self.assertEqual(self.logger._drops, 0)
+
+class SalaScheduleStorageTest(unittest.TestCase):
+    """Tests for the room schedule spool and final JSON"""
+
+    def _schedule(self, nombre: str) -> dict:
+        return {"horario": {"Lunes": [
+            {"nombre_asignatura": nombre, "capacidad": 30, "satisfaccion": 8}, None
+        ]}}
+
+    def test_generate_after_generate_keeps_rooms(self):
+        """Updates flushed after a generate must append to the spool, not replace it"""
+        async def run(tmp: Path):
+            with patch('src.json_stuff.json_salas._CWD', tmp):
+                storage = SalaScheduleStorage()
+                storage.set_scenario("test")
+
+            await storage.update_schedule("A101", "Kaufmann", self._schedule("Algebra"))
+            await storage.generate_json_file()
+            await storage.update_schedule("B202", "Chillan", self._schedule("Fisica"))
+            await storage.update_schedule("A101", "Kaufmann", self._schedule("Calculo"))
+            await storage.generate_json_file()
+
+            with open(storage.get_final_json_path(), encoding='utf-8') as f:
+                return {sala["Codigo"]: sala for sala in json.load(f)}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            salas = asyncio.run(run(Path(tmp)))
+
+        self.assertEqual(set(salas), {"A101", "B202"})
+        self.assertEqual(salas["A101"]["Asignaturas"][0]["Nombre"], "Calculo")
+        self.assertEqual(salas["B202"]["Campus"], "Chillan")
+        self.assertEqual(salas["B202"]["Asignaturas"][0]["Nombre"], "Fisica")
+
+    def test_generated_json_keeps_indented_layout(self):
+        """Horarios_salas.json stays an indent=2 array, as json.dump wrote it before the spool"""
+        async def run(tmp: Path):
+            with patch('src.json_stuff.json_salas._CWD', tmp):
+                storage = SalaScheduleStorage()
+                storage.set_scenario("test")
+
+            await storage.update_schedule("A101", "Kaufmann", self._schedule("Álgebra"))
+            await storage.update_schedule("B202", "Chillán", self._schedule("Física"))
+            await storage.generate_json_file()
+
+            with open(storage.get_final_json_path(), encoding='utf-8') as f:
+                return f.read()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            text = asyncio.run(run(Path(tmp)))
+
+        self.assertEqual(text, json.dumps(json.loads(text), indent=2, ensure_ascii=False))
+        self.assertEqual([sala["Codigo"] for sala in json.loads(text)], ["A101", "B202"])
+
+    def test_set_scenario_starts_a_new_spool(self):
+        """Flushes after set_scenario go to the new scenario's spool, the old one is closed"""
+        async def run(tmp: Path):
+            with patch('src.json_stuff.json_salas._CWD', tmp):
+                storage = SalaScheduleStorage()
+                storage.set_scenario("first")
+                await storage.update_schedule("A101", "Kaufmann", self._schedule("Algebra"))
+                await storage.force_flush()
+                storage.set_scenario("second")
+                await storage.update_schedule("B202", "Chillan", self._schedule("Fisica"))
+                await storage.force_flush()
+                await storage.generate_json_file()
+
+            self.assertIsNone(storage._stale_spool_file)
+            first_spool = (tmp / "agent_output" / "first" / SalaScheduleStorage.SPOOL_BASE_NAME).read_bytes()
+            with open(storage.get_final_json_path(), encoding='utf-8') as f:
+                return first_spool, [sala["Codigo"] for sala in json.load(f)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            first_spool, codigos = asyncio.run(run(Path(tmp)))
+
+        self.assertEqual(first_spool.count(b"\n"), 1)
+        self.assertIn(b"A101", first_spool)
+        self.assertEqual(codigos, ["B202"])
+
+    def test_failed_flush_rewinds_spool(self):
+        """A write that fails halfway leaves no partial line behind to shift the spool index"""
+        async def broken_write(f, data, chunk=None):
+            await f.write(data[:len(data) // 2])
+            raise OSError("disk full")
+
+        async def run(tmp: Path):
+            with patch('src.json_stuff.json_salas._CWD', tmp):
+                storage = SalaScheduleStorage()
+                storage.set_scenario("test")
+
+            await storage.update_schedule("A101", "Kaufmann", self._schedule("Algebra"))
+            await storage.force_flush()
+            await storage.update_schedule("B202", "Chillan", self._schedule("Fisica"))
+            with patch('src.json_stuff.json_salas._write_chunked', broken_write):
+                with self.assertRaises(OSError):
+                    await storage.force_flush()
+            await storage.update_schedule("C303", "Kaufmann", self._schedule("Quimica"))
+            await storage.generate_json_file()
+
+            with open(storage.get_final_json_path(), encoding='utf-8') as f:
+                return {sala["Codigo"]: sala for sala in json.load(f)}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            salas = asyncio.run(run(Path(tmp)))
+
+        self.assertEqual(set(salas), {"A101", "B202", "C303"})
+        self.assertEqual(salas["B202"]["Asignaturas"][0]["Nombre"], "Fisica")
+        self.assertEqual(salas["C303"]["Asignaturas"][0]["Nombre"], "Quimica")
+
+class KnowledgeBaseSearchTest(unittest.TestCase):
+    @staticmethod
+    def _sala(campus, capacidad, turno=1):
+        return AgentCapability("sala", {"campus": campus, "capacidad": capacidad, "turno": turno}, datetime.now())
+
+    def _populate(self, kb: AgentKnowledgeBase):
+        async def register():
+            await kb.register_agent(JID.fromstr("c@localhost"), [self._sala("Kaufmann", 40)])
+            await kb.register_agent(JID.fromstr("a@localhost"), [self._sala("Chillan", 40)])
+            # Campus and capacity only match on different capabilities
+            await kb.register_agent(JID.fromstr("b@localhost"), [
+                self._sala("Kaufmann", 20), self._sala("Chillan", 40)])
+            await kb.register_agent(JID.fromstr("d@localhost"), [
+                self._sala("Kaufmann", 40, turno=2),
+                AgentCapability("profesor", {"campus": "Kaufmann"}, datetime.now())])
+            # Re-registering keeps the agent's place in the registration order
+            await kb.register_agent(JID.fromstr("c@localhost"), [self._sala("Kaufmann", 40)])
+        asyncio.run(register())
+
+    def test_index_agrees_with_scan(self):
+        """Indexed searches return what the linear scan returns, in registration order"""
+        kb = AgentKnowledgeBase()
+        self._populate(kb)
+        queries = [
+            ("sala", {"campus": "Kaufmann", "capacidad": 40}),
+            ("sala", {"campus": "Chillan", "capacidad": 40}),
+            ("sala", {"campus": "Kaufmann", "capacidad": 20}),
+            ("sala", {"capacidad": 40}),
+            ("sala", {"turno": 2}),
+            ("profesor", {"campus": "Kaufmann"}),
+            ("sala", None),
+        ]
+        for service_type, properties in queries:
+            with self.subTest(service_type=service_type, properties=properties):
+                found = asyncio.run(kb.search(service_type, properties))
+                self.assertEqual([a.jid_str for a in found],
+                                 [a.jid_str for a in kb._scan(service_type, properties)])
+
+        found = asyncio.run(kb.search("sala", {"campus": "Kaufmann", "capacidad": 40}))
+        self.assertEqual([a.jid_str for a in found], ["c@localhost", "d@localhost"])
+        found = asyncio.run(kb.search("sala", {"capacidad": 40}))
+        self.assertEqual([a.jid_str for a in found], ["c@localhost", "a@localhost", "b@localhost", "d@localhost"])
+
+    def test_registration_invalidates_cached_search(self):
+        """A (de)registration bumps the generation, so the LRU can't serve a stale result"""
+        kb = AgentKnowledgeBase()
+        self._populate(kb)
+        query = ("sala", {"campus": "Chillan", "capacidad": 40})
+
+        first = asyncio.run(kb.search(*query))
+        self.assertIs(asyncio.run(kb.search(*query)), first)
+
+        asyncio.run(kb.register_agent(JID.fromstr("e@localhost"), [self._sala("Chillan", 40)]))
+        found = asyncio.run(kb.search(*query))
+        self.assertEqual([a.jid_str for a in found], ["a@localhost", "b@localhost", "e@localhost"])
+
+        asyncio.run(kb.deregister_agent(JID.fromstr("a@localhost")))
+        found = asyncio.run(kb.search(*query))
+        self.assertEqual([a.jid_str for a in found], ["b@localhost", "e@localhost"])
+
+    def test_cache_is_bounded(self):
+        """The search LRU evicts its oldest entry once CACHE_SIZE is exceeded"""
+        kb = AgentKnowledgeBase()
+        kb.CACHE_SIZE = 2
+        self._populate(kb)
+        for capacidad in (20, 40, 60):
+            asyncio.run(kb.search("sala", {"capacidad": capacidad}))
+        self.assertEqual(len(kb._cache), 2)
+        self.assertIsNone(kb._cache_get(kb._query_key("unknown", "search", "sala", {"capacidad": 20})))
+
+class ActionsMonitorTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        patcher = patch.multiple(ActionsMonitor, _instance=None, _instance_kwargs=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _files(self, name):
+        return {
+            "output_file": str(Path(self._tmp.name) / f"{name}_mas.csv"),
+            "request_log_file": str(Path(self._tmp.name) / f"{name}_requests.csv"),
+        }
+
+    def test_instance_is_shared(self):
+        """Calls with the first call's arguments all get the same monitor"""
+        monitor = ActionsMonitor.instance(**self._files("run"))
+        self.assertIsInstance(monitor, ActionsMonitor)
+        self.assertIs(ActionsMonitor.instance(**self._files("run")), monitor)
+
+    def test_instance_rejects_other_arguments(self):
+        """A later call can't silently get a monitor writing somewhere else"""
+        ActionsMonitor.instance(**self._files("run"))
+        with self.assertRaises(ValueError):
+            ActionsMonitor.instance(**self._files("other"))
+
+    def test_factory_patches_agents_only_after_start(self):
+        """patch_agent needs the monitor that start() sets up"""
+        async def run():
+            with patch('src.performance.agent_factory.OUTPUT_DIR', self._tmp.name):
+                factory = AgentFactory(scenario="test")
+            agent = MagicMock()
+            with self.assertRaises(RuntimeError):
+                factory.patch_agent(agent, "classroom", "A101")
+
+            await factory.start()
+            try:
+                factory.patch_agent(agent, "classroom", "A101")
+                self.assertIs(agent.start._monitor, factory.metrics_monitor)
+            finally:
+                await factory.stop()
+
+        asyncio.run(run())
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
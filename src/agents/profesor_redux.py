@@ -83,7 +83,7 @@ class AgenteProfesor(Agent):
         self.horario_ocupado = {day: set() for day in Day}
         
         # convert asignaturas dict to object
-        self.asignaturas = [Asignatura.from_json(asig) for asig in self.asignaturas]
+        self.asignaturas = Asignatura.from_json_list(self.asignaturas)
         
         # Initialize JSON structures
         self.horario_json = {"Asignaturas": []}
@@ -210,20 +210,20 @@ class AgenteProfesor(Agent):
             return
             
         current = self.get_current_subject()
-        current_name = current.get_nombre()
-        current_code = current.get_codigo_asignatura()
+        current_name = current.nombre
+        current_code = current.codigo_asignatura
         self.asignatura_actual += 1
         
         if self.asignatura_actual < len(self.asignaturas):
             next_subject = self.asignaturas[self.asignatura_actual]
-            if (next_subject.get_nombre() == current_name and 
-                next_subject.get_codigo_asignatura() == current_code):
+            if (next_subject.nombre == current_name and 
+                next_subject.codigo_asignatura == current_code):
                 self.current_instance_index += 1
                 self.log.info(f" [MOVE] Moving to next instance ({self.current_instance_index}) "
                             f"of {current_name}")
             else:
                 self.current_instance_index = 0
-                self.log.info(f" [MOVE] Moving to new subject {next_subject.get_nombre()}")
+                self.log.info(f" [MOVE] Moving to new subject {next_subject.nombre}")
         else:
             self.log.info(f" [MOVE] Reached end of subjects")
     
@@ -258,15 +258,15 @@ class AgenteProfesor(Agent):
                 
             # Find the campus for the subject
             for asig in self.asignaturas:
-                if asig.get_nombre() == nombre_asig:
-                    return BloqueInfo(asig.get_campus(), bloque)
+                if asig.nombre == nombre_asig:
+                    return BloqueInfo(asig.campus, bloque)
         
         return None
 
     def get_current_instance_key(self) -> str:
         """Get a unique key for the current subject instance."""
         current = self.get_current_subject()
-        return f"{current.get_nombre()}-{current.get_codigo_asignatura()}-{self.current_instance_index}"
+        return f"{current.nombre}-{current.codigo_asignatura}-{self.current_instance_index}"
 
     async def update_schedule_info(self, dia: Day, sala: str, bloque: int, nombre_asignatura: str, satisfaccion: int):
         """Update the schedule information with a new assignment."""
@@ -329,21 +329,21 @@ class AgenteProfesor(Agent):
         current_subject = self.get_current_subject()
         
         asignatura = {
-            "Nombre": current_subject.get_nombre(),
+            "Nombre": current_subject.nombre,
             "Sala": sala,
             "Bloque": bloque,
             "Dia": dia.value,
             "Satisfaccion": satisfaccion,
-            "CodigoAsignatura": current_subject.get_codigo_asignatura(),
+            "CodigoAsignatura": current_subject.codigo_asignatura,
             "Instance": self.current_instance_index,
-            "Actividad": current_subject.get_actividad().name
+            "Actividad": current_subject.actividad.name
         }
         
         self.horario_json["Asignaturas"].append(asignatura)
         
     @staticmethod
     def inferir_tipo_contrato(asignaturas: List[Asignatura]) -> TipoContrato:
-        total_hours = sum(asig.get_horas() for asig in asignaturas)
+        total_hours = sum(asig.horas for asig in asignaturas)
         if 16 <= total_hours <= 18:
             return TipoContrato.JORNADA_COMPLETA
         elif 12 <= total_hours <= 14:
@@ -19,7 +19,12 @@ from objects.helper.quick_rejector import RoomQuickRejectFilter
 from performance.rtt_stats import RTTLogger
 import uuid
 from msgspec import json as msgspec_json
-from math import ceil
+import numpy as np
+
+# Reused across messages; XMPP bodies are text, so the wire format stays JSON
+_ENCODER = msgspec_json.Encoder()
+_AVAILABILITY_DECODER = msgspec_json.Decoder(ClassroomAvailability)
+_CONFIRMATION_DECODER = msgspec_json.Decoder(BatchAssignmentConfirmation)
 
 # States for the FSM
 class NegotiationStates:
@@ -77,77 +82,14 @@ class NegotiationFSM(FSMBehaviour):
         return self.bloques_pendientes
         
 class CFPSenderState(State):
-    MEETING_ROOM_THRESHOLD = 10
-    
     def __init__(self, parent: NegotiationFSM):
         self.parent = parent
-        # self.room_filter = RoomQuickRejectFilter()
-        self._quick_rj_cache : Dict[str, bool] = {}
+        self.room_filter = RoomQuickRejectFilter()
         # self.rtt_logger = parent.agent.rtt_logger
         # self.rtt_logger : 'RTTLogger' = None
         self.rtt_initialized = False
         super().__init__()
         
-    def _get_quick_rj_cache_key(self, subject_code: str, room_id: str) -> str:
-        """Generate cache key from subject and room IDs"""
-        return f"{subject_code}-{room_id}"
-        
-    def can_quick_reject(self, 
-                             subject_name: str,
-                             subject_code: str, 
-                             subject_campus: str,
-                             subject_vacancies: int,
-                             room_code: str,
-                             room_campus: str,
-                             room_capacity: int) -> bool:
-        """
-        Quickly determine if a room can be rejected without full evaluation
-        
-        Args:
-            subject_name: Name of the subject
-            subject_code: Subject's code
-            subject_campus: Subject's campus
-            subject_vacancies: Number of students
-            room_code: Room's code
-            room_campus: Room's campus  
-            room_capacity: Room's capacity
-            
-        Returns:
-            bool: True if room can be rejected, False if it needs full evaluation
-        """
-        cache_key = self._get_quick_rj_cache_key(subject_code, room_code)
-
-        if cache_key not in self._quick_rj_cache:
-            # Quick reject conditions
-            should_reject = False
-            
-            # Campus mismatch
-            if room_campus != subject_campus:
-                should_reject = True
-                
-            else:
-                # Meeting room logic
-                subject_needs_meeting_room = subject_vacancies < self.MEETING_ROOM_THRESHOLD
-                is_meeting_room = room_capacity < self.MEETING_ROOM_THRESHOLD
-                
-                # Reject if meeting room requirements don't match
-                if subject_needs_meeting_room != is_meeting_room:
-                    should_reject = True
-                    
-                # For meeting rooms, be more lenient with capacity
-                elif is_meeting_room:
-                    should_reject = room_capacity < ceil(subject_vacancies * 0.8)
-                    
-                # For regular rooms
-                else:
-                    should_reject = room_capacity < subject_vacancies
-                    
-            # Cache the result
-            self._quick_rj_cache[cache_key] = should_reject
-
-            return should_reject
-        return self._quick_rj_cache[cache_key]
-
     @staticmethod
     def sanitize_subject_name(name: str) -> str:
         """Sanitize subject name removing special characters"""
@@ -181,10 +123,10 @@ class CFPSenderState(State):
 
             # Build request info
             solicitud_info = {
-                "nombre": self.sanitize_subject_name(current_subject.get_nombre()),
-                "vacantes": current_subject.get_vacantes(),
-                "nivel": current_subject.get_nivel(),
-                "campus": current_subject.get_campus(),
+                "nombre": self.sanitize_subject_name(current_subject.nombre),
+                "vacantes": current_subject.vacantes,
+                "nivel": current_subject.nivel,
+                "campus": current_subject.campus,
                 "bloques_pendientes": self.parent.bloques_pendientes,
                 "sala_asignada": self.parent.assignation_data.get_sala_asignada(),
                 "ultimo_dia": self.parent.assignation_data.get_ultimo_dia_asignado().name if self.parent.assignation_data.get_ultimo_dia_asignado() else "",
@@ -192,37 +134,33 @@ class CFPSenderState(State):
             }
 
             cfp_count = 0
-            # Filter rooms before sending CFPs
+            reject_ctx = self.room_filter.build_subject_ctx(current_subject)
+
+            # Extract room properties from capabilities
+            sala_rooms = []
             for room in rooms:
-                # Extract room properties from capabilities
                 room_caps = next((cap for cap in room.capabilities if cap.service_type == "sala"), None)
-                if not room_caps:
-                    continue
-                
-                room_props = room_caps.properties
-                
-                should_reject = self.can_quick_reject(
-                    subject_name=current_subject.get_nombre(),
-                    subject_code=current_subject.get_codigo_asignatura(),
-                    subject_campus=current_subject.get_campus(),
-                    subject_vacancies=current_subject.get_vacantes(),
-                    room_code=room_props["codigo"],
-                    room_campus=room_props["campus"],
-                    room_capacity=room_props["capacidad"]
-                )
-                
-                if should_reject:
-                    continue
+                if room_caps:
+                    sala_rooms.append((room, room_caps.properties))
+
+            # Filter rooms before sending CFPs, all at once
+            campus_ids, capacities = self.room_filter.pack_rooms(
+                (room_props["campus"], room_props["capacidad"]) for _, room_props in sala_rooms
+            )
+            reject = self.room_filter.filter_rooms(reject_ctx, campus_ids, capacities)
+
+            for idx in np.flatnonzero(~reject):
+                room_jid = str(sala_rooms[idx][0].jid)
                 
                 msg = Message(
-                    to=str(room.jid)
+                    to=room_jid
                 )
                 
                 msg.set_metadata("protocol", "contract-net")
                 msg.set_metadata("performative", FIPAPerformatives.CFP)
                 msg.set_metadata("conversation-id", f"neg-{self.agent.nombre}-{self.parent.bloques_pendientes}")
                 # msg.body = json.dumps(solicitud_info)
-                msg.body = msgspec_json.encode(solicitud_info).decode("utf-8")
+                msg.body = _ENCODER.encode(solicitud_info).decode("utf-8")
                 
                 cfp_id = f"cfp-{str(uuid.uuid4())}"
                 msg.set_metadata("rtt-id", cfp_id)
@@ -231,11 +169,11 @@ class CFPSenderState(State):
                     agent_name=self.parent.agent.nombre,
                     conversation_id=cfp_id,
                     performative=FIPAPerformatives.CFP,
-                    receiver=str(room.jid),
+                    receiver=room_jid,
                     ontology="classroom-availability"
                 )
                 
-                await self.agent.message_logger.log_message_sent(
+                self.agent.message_logger.log_message_sent(
                     agent_name=self.agent.representative_name,
                     message=msg
                 )
@@ -270,7 +208,7 @@ class SetupState(CFPSenderState):
             self.set_next_state(NegotiationStates.FINISHED)
             return
 
-        self.parent.bloques_pendientes = current_subject.get_horas()
+        self.parent.bloques_pendientes = current_subject.horas
         self.parent.assignation_data.clear()
         
         # SPADE specific stuff, JADE doesn't have it.
@@ -284,20 +222,20 @@ class SetupState(CFPSenderState):
         cfp_count = self.parent.cfp_count
         
         if cfp_count > 0:
-            self.agent.log.info(f"Sent {cfp_count} CFPs for {current_subject.get_nombre()} type: {current_subject.get_actividad()}")
+            self.agent.log.info(f"Sent {cfp_count} CFPs for {current_subject.nombre} type: {current_subject.actividad}")
             self.set_next_state(NegotiationStates.COLLECTING)
             self.parent.timeout = self.parent.BASE_TIMEOUT
         else:
             # NOTE: THIS SHOULDN'T EVEN HAPPEN...
             # Handle the case where no rooms are available
-            self.agent.log.warning(f"No suitable rooms found for {current_subject.get_nombre()} (retry {self.parent.retry_count + 1}/{self.parent.MAX_RETRIES})")
+            self.agent.log.warning(f"No suitable rooms found for {current_subject.nombre} (retry {self.parent.retry_count + 1}/{self.parent.MAX_RETRIES})")
             
             # Increment retry count
             self.parent.retry_count += 1
             
             # If we've reached max retries, move to the next subject
             if self.parent.retry_count >= self.parent.MAX_RETRIES:
-                self.agent.log.info(f"Max retries reached for {current_subject.get_nombre()}, moving to next subject")
+                self.agent.log.info(f"Max retries reached for {current_subject.nombre}, moving to next subject")
                 self.agent.move_to_next_subject()
                 self.parent.retry_count = 0
             
@@ -332,7 +270,7 @@ class CollectingState(CFPSenderState):
                 msg = await self.receive(timeout=0.5)
                 
                 if msg:
-                    await self.parent.agent.message_logger.log_message_received(
+                    self.parent.agent.message_logger.log_message_received(
                         agent_name=self.parent.agent.representative_name,
                         message=msg
                     )
@@ -382,7 +320,7 @@ class CollectingState(CFPSenderState):
         if self.parent.retry_count >= self.parent.MAX_RETRIES:
             current_subject = self.agent.get_current_subject()
             
-            if self.parent.bloques_pendientes == current_subject.get_horas():
+            if self.parent.bloques_pendientes == current_subject.horas:
                 self.agent.move_to_next_subject()
             else:
                 self.parent.assignation_data.set_sala_asignada(None)
@@ -407,7 +345,7 @@ class CollectingState(CFPSenderState):
         """
         try:
             # Parse the content (assumed to be JSON)
-            availability = msgspec_json.decode(msg.body, type=ClassroomAvailability)
+            availability = _AVAILABILITY_DECODER.decode(msg.body)
 
             if availability:
                 # Create batch proposal
@@ -469,13 +407,13 @@ class EvaluatingState(CFPSenderState):
     async def try_assign_batch_proposals(self, batch_proposals: List[BatchProposal]) -> bool:
         """Try to assign batch proposals to classrooms"""
         current_subject = self.agent.get_current_subject()
-        required_hours = current_subject.get_horas()
+        required_hours = current_subject.horas
         batch_start_time = datetime.now()
 
         if self.parent.bloques_pendientes <= 0 or self.parent.bloques_pendientes > required_hours:
             self.agent.log.error(
                 f"Invalid pending hours state: {self.parent.bloques_pendientes}/{required_hours} "
-                f"for {current_subject.get_nombre()}"
+                f"for {current_subject.nombre}"
             )
             return False
 
@@ -487,7 +425,7 @@ class EvaluatingState(CFPSenderState):
             requests = []
 
             # Process each day's blocks in this room
-            for day, block_proposals in batch_proposal.get_day_proposals().items():
+            for day, block_proposals in batch_proposal.day_proposals.items():
                 daily_count = daily_assignments.get(day, 0)
                 # Skip if day already has 2 blocks
                 if daily_count >= 2:
@@ -500,16 +438,16 @@ class EvaluatingState(CFPSenderState):
                         break
 
                     # Skip if block not available
-                    if not self.agent.is_block_available(day, block.get_block()):
+                    if not self.agent.is_block_available(day, block.block):
                         continue
 
                     requests.append(AssignmentRequest(
                         day=day,
-                        block=block.get_block(),
-                        subject_name=current_subject.get_nombre(),
-                        satisfaction=batch_proposal.get_satisfaction_score(),
-                        classroom_code=batch_proposal.get_room_code(),
-                        vacancy=current_subject.get_vacantes(),
+                        block=block.block,
+                        subject_name=current_subject.nombre,
+                        satisfaction=batch_proposal.satisfaction_score,
+                        classroom_code=batch_proposal.room_code,
+                        vacancy=current_subject.vacantes,
                         prof_name=self.agent.nombre
                     ))
 
@@ -518,17 +456,17 @@ class EvaluatingState(CFPSenderState):
 
             if len(requests) > 0:
                 try:
-                    if await self.send_batch_assignment(requests, batch_proposal.get_original_message()):
+                    if await self.send_batch_assignment(requests, batch_proposal.original_message):
                         self.agent.log.info(
                             f"Successfully assigned {len(requests)} blocks in room "
-                            f"{batch_proposal.get_room_code()} for {current_subject.get_nombre()}"
+                            f"{batch_proposal.room_code} for {current_subject.nombre}"
                         )
 
                         proposal_time = (datetime.now() - proposal_start_time).total_seconds() * 1000
                         self.agent.log.info(
-                            f"[TIMING] Room {batch_proposal.get_room_code()} assignment took "
+                            f"[TIMING] Room {batch_proposal.room_code} assignment took "
                             f"{proposal_time} ms - Assigned {len(requests)} blocks for "
-                            f"{current_subject.get_nombre()}"
+                            f"{current_subject.nombre}"
                         )
                 except Exception as e:
                     self.agent.log.error(f"Error in batch assignment: {str(e)}")
@@ -536,7 +474,7 @@ class EvaluatingState(CFPSenderState):
 
         total_batch_time = (datetime.now() - batch_start_time).total_seconds() * 1000
         self.agent.log.info(
-            f"[TIMING] Total batch assignment time for {current_subject.get_nombre()}: "
+            f"[TIMING] Total batch assignment time for {current_subject.nombre}: "
             f"{total_batch_time} ms - Total blocks assigned: {total_assigned}"
         )
 
@@ -562,7 +500,7 @@ class EvaluatingState(CFPSenderState):
             msg.set_metadata("conversation-id", conv_id)
             msg.set_metadata("protocol", "contract-net")
             
-            msg.body = msgspec_json.encode(BatchAssignmentRequest(requests)).decode("utf-8")
+            msg.body = _ENCODER.encode(BatchAssignmentRequest(requests)).decode("utf-8")
             
             # id_prop = f"assign-{str(uuid.uuid4())}"
             # msg.set_metadata("rtt-id", id_prop)
@@ -575,7 +513,7 @@ class EvaluatingState(CFPSenderState):
             #    ontology="room-assignment"
             #)
             
-            await self.agent.message_logger.log_message_sent(
+            self.agent.message_logger.log_message_sent(
                 agent_name=self.agent.representative_name,
                 message=msg
             )
@@ -591,13 +529,13 @@ class EvaluatingState(CFPSenderState):
                 confirmation_msg = await self.receive(timeout=0.5)
                 # TODO: Remove this if branch.
                 if confirmation_msg:
-                    await self.agent.message_logger.log_message_received(
+                    self.agent.message_logger.log_message_received(
                         agent_name=self.agent.representative_name,
                         message=confirmation_msg
                     )
                 
                 if confirmation_msg and self.is_valid_confirm(confirmation_msg, original_msg.sender, conv_id):
-                    confirmation_data: BatchAssignmentConfirmation = msgspec_json.decode(confirmation_msg.body, type=BatchAssignmentConfirmation)
+                    confirmation_data: BatchAssignmentConfirmation = _CONFIRMATION_DECODER.decode(confirmation_msg.body)
 
                     #await self.rtt_logger.end_request(
                     #    id_prop,
@@ -608,20 +546,20 @@ class EvaluatingState(CFPSenderState):
                     # )
 
                     # Process confirmed assignments
-                    for assignment in confirmation_data.get_confirmed_assignments():
+                    for assignment in confirmation_data.confirmed_assignments:
                         await self.agent.update_schedule_info(
-                            dia=assignment.get_day(),
-                            sala=assignment.get_classroom_code(),
-                            bloque=assignment.get_block(),
-                            nombre_asignatura=self.agent.get_current_subject().get_nombre(),
-                            satisfaccion=assignment.get_satisfaction()
+                            dia=assignment.day,
+                            sala=assignment.classroom_code,
+                            bloque=assignment.block,
+                            nombre_asignatura=self.agent.get_current_subject().nombre,
+                            satisfaccion=assignment.satisfaction
                         )
 
                         self.parent.bloques_pendientes -= 1
                         self.parent.assignation_data.assign(
-                            assignment.get_day(),
-                            assignment.get_classroom_code(),
-                            assignment.get_block()
+                            assignment.day,
+                            assignment.classroom_code,
+                            assignment.block
                         )
 
                     return True
@@ -752,7 +690,7 @@ class FinishedState(State):
                 msg.set_metadata("nextOrden", str(next_orden))
                 # msg.set_metadata("require-ack", "true")
                 msg.body = "START"
-                await self.agent.message_logger.log_message_sent(
+                self.agent.message_logger.log_message_sent(
                     agent_name=self.agent.representative_name,
                     message=msg
                 )
@@ -780,7 +718,7 @@ class FinishedState(State):
                         # shutdown_msg.set_metadata("content", "NULL_PROF")
                         shutdown_msg.body = "NULL_PROF"
                         
-                        await self.agent.message_logger.log_message_sent(
+                        self.agent.message_logger.log_message_sent(
                             agent_name=self.agent.representative_name,
                             message=shutdown_msg
                         )
@@ -14,7 +14,7 @@ class EsperarTurnoBehaviour(CyclicBehaviour):
         
         if msg:
             try:
-                await self.agent.message_logger.log_message_received(
+                self.agent.message_logger.log_message_received(
                     self.profesor.representative_name, msg
                 )
                 content = msg.body
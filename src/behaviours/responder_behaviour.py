@@ -2,12 +2,11 @@ from spade.agent import Agent
 from spade.behaviour import CyclicBehaviour, PeriodicBehaviour
 from spade.message import Message
 from typing import Dict, List
-import json
 import asyncio
 
 from ..objects.asignation_data import AsignacionSala
 from ..objects.helper.batch_proposals import ClassroomAvailability
-from ..objects.helper.batch_requests import BatchAssignmentRequest
+from ..objects.helper.batch_requests import BatchAssignmentRequest, RoomRequest
 from ..objects.helper.confirmed_assignments import BatchAssignmentConfirmation, ConfirmedAssignment
 
 from ..fipa.acl_message import FIPAPerformatives
@@ -16,6 +15,10 @@ import jsonpickle
 from ..performance.rtt_stats import RTTLogger
 from msgspec import json as msgspec_json
 
+_ENCODER = msgspec_json.Encoder()
+_CFP_DECODER = msgspec_json.Decoder(RoomRequest)
+_REQUEST_DECODER = msgspec_json.Decoder(BatchAssignmentRequest)
+
 class ResponderSolicitudesBehaviour(CyclicBehaviour):
     MAX_BLOQUE_DIURNO = 9
     
@@ -38,7 +41,7 @@ class ResponderSolicitudesBehaviour(CyclicBehaviour):
                 # await asyncio.sleep(0.1)
                 return
             
-            await self.agent.message_logger.log_message_received(
+            self.agent.message_logger.log_message_received(
                 agent_name=self.agent.representative_name,
                 message=msg
             )
@@ -65,9 +68,9 @@ class ResponderSolicitudesBehaviour(CyclicBehaviour):
         """Process incoming room requests with improved error handling"""
         try:
             # Parse request data
-            request_data = json.loads(msg.body)
-            subject_name = self.agent.sanitize_subject_name(request_data["nombre"])
-            vacancies = request_data["vacantes"]
+            request_data: RoomRequest = _CFP_DECODER.decode(msg.body)
+            subject_name = self.agent.sanitize_subject_name(request_data.nombre)
+            vacancies = request_data.vacantes
             
             # Check availability with timeout protection
             # async with asyncio.timeout(1.0):
@@ -91,7 +94,7 @@ class ResponderSolicitudesBehaviour(CyclicBehaviour):
                 )
 
                 reply = self.__create_reply(msg, FIPAPerformatives.PROPOSE)
-                reply.body = msgspec_json.encode(availability).decode('utf-8')
+                reply.body = _ENCODER.encode(availability).decode('utf-8')
 
                 await self.rtt_logger.record_message_sent(
                     agent_name=self.agent.name,
@@ -101,7 +104,7 @@ class ResponderSolicitudesBehaviour(CyclicBehaviour):
                     ontology="classroom-availability",
                 )
                 
-                await self.agent.message_logger.log_message_sent(
+                self.agent.message_logger.log_message_sent(
                     agent_name=self.agent.representative_name,
                     message=reply,
                 )
@@ -119,7 +122,7 @@ class ResponderSolicitudesBehaviour(CyclicBehaviour):
                     ontology="classroom-availability",
                 )
                 
-                await self.agent.message_logger.log_message_sent(
+                self.agent.message_logger.log_message_sent(
                     agent_name=self.agent.representative_name,
                     message=reply,
                 )                
@@ -149,11 +152,11 @@ class ResponderSolicitudesBehaviour(CyclicBehaviour):
     async def confirm_assignment(self, msg: Message):
         """Handle assignment confirmation with improved verification"""
         try:
-            request_data : BatchAssignmentRequest = msgspec_json.decode(msg.body, type=BatchAssignmentRequest)
+            request_data : BatchAssignmentRequest = _REQUEST_DECODER.decode(msg.body)
             confirmed_assignments = []
             
             # async with asyncio.timeout(1.0):
-            for assignment in request_data.get_assignments():
+            for assignment in request_data.assignments:
                 if assignment.classroom_code != self.agent.codigo:
                     self.agent.log.debug(f"[DEBUG] Skipping request for different room: {assignment.classroom_code}")
                     continue
@@ -200,9 +203,9 @@ class ResponderSolicitudesBehaviour(CyclicBehaviour):
                 reply.set_metadata("performative", FIPAPerformatives.INFORM)
                 reply.set_metadata("ontology", "room-assignment")
                 reply.set_metadata("conversation-id", msg.get_metadata("conversation-id"))
-                reply.body = msgspec_json.encode(confirmation).decode('utf-8')
+                reply.body = _ENCODER.encode(confirmation).decode('utf-8')
                 
-                await self.agent.message_logger.log_message_sent(
+                self.agent.message_logger.log_message_sent(
                     agent_name=self.agent.representative_name,
                     message=reply,
                 )
@@ -5,7 +5,7 @@ from objects.static.agent_enums import Day, TipoContrato, Actividad
 from dataclasses import dataclass
 from .timetabling_evaluator import TimetablingEvaluator
 
-@dataclass
+@dataclass(slots=True)
 class BatchProposalScore:
     """Helper class to store proposal with its score"""
     proposal: BatchProposal
@@ -25,10 +25,10 @@ class ConstraintEvaluator:
             return []
 
         current_subject = self.profesor.get_current_subject()
-        current_campus = current_subject.get_campus()
-        current_nivel = current_subject.get_nivel()
-        current_asignatura_nombre = current_subject.get_nombre()
-        needs_meeting_room = current_subject.get_vacantes() < self.MEETING_ROOM_THRESHOLD
+        current_campus = current_subject.campus
+        current_nivel = current_subject.nivel
+        current_asignatura_nombre = current_subject.nombre
+        needs_meeting_room = current_subject.vacantes < self.MEETING_ROOM_THRESHOLD
 
         # Get current schedule info
         current_schedule = self.profesor.get_blocks_by_subject(current_asignatura_nombre)
@@ -75,7 +75,7 @@ class ConstraintEvaluator:
             for block in blocks:
                 info = self.profesor.get_bloque_info(day, block)
                 if info:
-                    room = info.get_campus()
+                    room = info.campus
                     count = room_usage.get(room, 0) + 1
                     room_usage[room] = count
                     if most_used_room is None or count > room_usage.get(most_used_room, 0):
@@ -92,11 +92,11 @@ class ConstraintEvaluator:
         current_asignatura_nombre: str
     ) -> bool:
         """Check if a proposal is valid based on various constraints"""
-        is_meeting_room = proposal.get_capacity() < self.MEETING_ROOM_THRESHOLD
+        is_meeting_room = proposal.capacity < self.MEETING_ROOM_THRESHOLD
 
         # Meeting room logic
         if needs_meeting_room:
-            if not is_meeting_room and proposal.get_capacity() > current_subject.get_vacantes() * 4:
+            if not is_meeting_room and proposal.capacity > current_subject.vacantes * 4:
                 return False
         elif is_meeting_room:
             return False
@@ -121,7 +121,7 @@ class ConstraintEvaluator:
             all_blocks.extend(blocks)
 
         # Add proposed blocks
-        all_blocks.extend([block.get_block() for block in proposed_blocks])
+        all_blocks.extend([block.block for block in proposed_blocks])
 
         # Sort blocks
         all_blocks.sort()
@@ -141,7 +141,7 @@ class ConstraintEvaluator:
         
     def validate_gaps_for_proposal(self, proposal: BatchProposal) -> bool:
         """Validate gaps for all days in a proposal"""
-        for day, block_proposals in proposal.get_day_proposals().items():
+        for day, block_proposals in proposal.day_proposals.items():
             if not self.validate_consecutive_gaps(day, block_proposals):
                 return False
         return True
@@ -154,19 +154,19 @@ class ConstraintEvaluator:
         asignatura_nombre: str
     ) -> bool:
         """Fast validation of proposal basics"""
-        if not self.check_campus_constraints(proposal, asignatura.get_campus()):
+        if not self.check_campus_constraints(proposal, asignatura.campus):
             return False
 
-        for day, blocks in proposal.get_day_proposals().items():
+        for day, blocks in proposal.day_proposals.items():
             asignaturas_en_dia = self.profesor.get_blocks_by_day(day)
             existing_blocks = asignaturas_en_dia.get(asignatura_nombre, [])
 
             if existing_blocks and len(existing_blocks) >= 2:
                 continue
 
-            proposed_blocks = [block.get_block() for block in blocks]
+            proposed_blocks = [block.block for block in blocks]
 
-            act  = asignatura.get_actividad()
+            act  = asignatura.actividad
             if act != Actividad.TALLER and act != Actividad.LABORATORIO:
                 sorted_blocks = sorted(proposed_blocks + (existing_blocks or []))
                 continuous_count = 1
@@ -177,7 +177,7 @@ class ConstraintEvaluator:
                             continue
 
             for block in blocks:
-                bloque = block.get_block()
+                bloque = block.block
                 
                 if not (1 <= bloque <= self.MAX_BLOQUE_DIURNO):
                     continue
@@ -189,7 +189,7 @@ class ConstraintEvaluator:
                 if is_odd_year:
                     if bloque > 4 and bloque != self.MAX_BLOQUE_DIURNO:
                         continue
-                elif bloque < 5 and proposal.get_satisfaction_score() < 8:
+                elif bloque < 5 and proposal.satisfaction_score < 8:
                     continue
 
                 return True
@@ -198,21 +198,21 @@ class ConstraintEvaluator:
     
     def check_campus_constraints(self, proposal: BatchProposal, current_campus: str) -> bool:
         """Check if campus constraints are satisfied"""
-        proposed_campus = self.get_campus_sala(proposal.get_room_code())
+        proposed_campus = self.get_campus_sala(proposal.room_code)
 
         # If same campus, always valid
         if proposed_campus == current_campus:
             return True
 
         # Check transitions for each day in the proposal
-        for day, block_proposals in proposal.get_day_proposals().items():
+        for day, block_proposals in proposal.day_proposals.items():
             # Check if there's already a campus transition this day
             if self.has_existing_transition_in_day(day):
                 return False
 
             # Validate buffer blocks for each proposed block
             for block_proposal in block_proposals:
-                if not self.validate_transition_buffer(day, block_proposal.get_block(), proposal.get_room_code()):
+                if not self.validate_transition_buffer(day, block_proposal.block, proposal.room_code):
                     return False
 
         return True
@@ -225,10 +225,10 @@ class ConstraintEvaluator:
         next_block = self.profesor.get_bloque_info(day, block + 1)
 
         # Check if there's at least one empty block between different campuses
-        if prev_block and prev_block.get_campus() != proposed_campus:
+        if prev_block and prev_block.campus != proposed_campus:
             return self.profesor.is_block_available(day, block - 1)
 
-        if next_block and next_block.get_campus() != proposed_campus:
+        if next_block and next_block.campus != proposed_campus:
             return self.profesor.is_block_available(day, block + 1)
 
         return True
@@ -246,13 +246,13 @@ class ConstraintEvaluator:
                 if info:
                     blocks.append(info)
 
-        blocks.sort(key=lambda x: x.get_bloque())
+        blocks.sort(key=lambda x: x.bloque)
 
         previous_campus = None
         for block in blocks:
-            if previous_campus and previous_campus != block.get_campus():
+            if previous_campus and previous_campus != block.campus:
                 return True
-            previous_campus = block.get_campus()
+            previous_campus = block.campus
 
         return False
     
@@ -304,37 +304,37 @@ class ConstraintEvaluator:
         score = 0
 
         # Campus consistency (high priority)
-        if proposal.get_campus() == current_campus:
+        if proposal.campus == current_campus:
             score += 10000
         else:
             score -= 10000
 
         # Time preference based on year
         is_odd_year = nivel % 2 == 1
-        for day, blocks in proposal.get_day_proposals().items():
+        for day, blocks in proposal.day_proposals.items():
             for block in blocks:
                 if is_odd_year:
-                    if block.get_block() <= 4:
+                    if block.block <= 4:
                         score += 3000
                 else:
-                    if block.get_block() >= 5:
+                    if block.block >= 5:
                         score += 3000
 
             if self.profesor.get_tipo_contrato() != TipoContrato.JORNADA_PARCIAL:
                 if len(blocks) > 1:
-                    sorted_blocks = sorted(blocks, key=lambda b: b.get_block())
+                    sorted_blocks = sorted(blocks, key=lambda b: b.block)
                     for i in range(1, len(sorted_blocks)):
-                        gap = sorted_blocks[i].get_block() - sorted_blocks[i-1].get_block()
+                        gap = sorted_blocks[i].block - sorted_blocks[i-1].block
                         if gap <= 2:  # Consecutive blocks or one block gap
                             score += 5000  # High bonus for compact schedules
                         else:
                             score -= 8000  # Penalty for large gaps
 
         # Base satisfaction score
-        score += proposal.get_satisfaction_score() * 10
+        score += proposal.satisfaction_score * 10
 
         # Capacity score - prefer rooms that closely match needed capacity
-        capacity_diff = abs(proposal.get_capacity() - subject.get_vacantes())
+        capacity_diff = abs(proposal.capacity - subject.vacantes)
         score -= capacity_diff * 100
 
         return score
@@ -348,20 +348,20 @@ class ConstraintEvaluator:
         current_schedule: Dict[Day, List[int]]
     ):
         """Calculate satisfaction scores for a proposal"""
-        for day_proposals in proposal.get_day_proposals().values():
+        for day_proposals in proposal.day_proposals.values():
             for block_proposal in day_proposals:
                 satisfaction = TimetablingEvaluator.calculate_satisfaction(
-                    proposal.get_capacity(),
-                    current_subject.get_vacantes(),
+                    proposal.capacity,
+                    current_subject.vacantes,
                     current_nivel,
-                    proposal.get_campus(),
+                    proposal.campus,
                     current_campus,
-                    block_proposal.get_block(),
+                    block_proposal.block,
                     current_schedule,
                     self.profesor.get_tipo_contrato(),
-                    current_subject.get_actividad()
+                    current_subject.actividad
                 )
-                proposal.set_satisfaction_score(satisfaction)
+                proposal.satisfaction_score = satisfaction
     
     def apply_meeting_room_score(
         self,
@@ -371,7 +371,7 @@ class ConstraintEvaluator:
         current_subject: Asignatura
     ) -> int:
         """Apply scoring adjustments for meeting room requirements"""
-        is_meeting_room = proposal.get_capacity() < self.MEETING_ROOM_THRESHOLD
+        is_meeting_room = proposal.capacity < self.MEETING_ROOM_THRESHOLD
 
         if needs_meeting_room:
             if is_meeting_room:
@@ -379,12 +379,12 @@ class ConstraintEvaluator:
                 total_score += 15000
 
                 # Additional bonus for optimal size match
-                size_diff = abs(proposal.get_capacity() - current_subject.get_vacantes())
+                size_diff = abs(proposal.capacity - current_subject.vacantes)
                 if size_diff <= 2:
                     total_score += 5000
             else:
                 # Using regular room for small class - apply penalty but don't reject
-                oversize = proposal.get_capacity() - current_subject.get_vacantes()
+                oversize = proposal.capacity - current_subject.vacantes
                 total_score -= oversize * 500  # Progressive penalty for oversized rooms
 
         return total_score
@@ -399,7 +399,7 @@ class ConstraintEvaluator:
         room_usage: Dict[str, int]
     ) -> int:
         """Apply scoring adjustments based on daily schedule patterns"""
-        for day, block_proposals in proposal.get_day_proposals().items():
+        for day, block_proposals in proposal.day_proposals.items():
             day_usage = blocks_per_day.get(day, 0)
 
             # Day-based scoring
@@ -409,7 +409,7 @@ class ConstraintEvaluator:
                 total_score += 8000  # Bonus for new days
 
             # Room consistency scoring
-            if proposal.get_room_code() == most_used_room:
+            if proposal.room_code == most_used_room:
                 total_score += 7000
 
             # Apply campus and block penalties
@@ -430,18 +430,18 @@ class ConstraintEvaluator:
         room_usage: Dict[str, int]
     ) -> int:
         """Apply penalties for campus transitions and block assignments"""
-        if not proposal.get_room_code().startswith(current_campus[0:1]):
+        if not proposal.room_code.startswith(current_campus[0:1]):
             total_score -= 10000
 
-            for block in proposal.get_day_proposals()[day]:
-                prev_block = self.profesor.get_bloque_info(day, block.get_block() - 1)
-                next_block = self.profesor.get_bloque_info(day, block.get_block() + 1)
+            for block in proposal.day_proposals[day]:
+                prev_block = self.profesor.get_bloque_info(day, block.block - 1)
+                next_block = self.profesor.get_bloque_info(day, block.block + 1)
 
-                if ((prev_block and prev_block.get_campus() != current_campus) or
-                    (next_block and next_block.get_campus() != current_campus)):
+                if ((prev_block and prev_block.campus != current_campus) or
+                    (next_block and next_block.campus != current_campus)):
                     total_score -= 8000
 
-        room_count = room_usage.get(proposal.get_room_code(), 0)
+        room_count = room_usage.get(proposal.room_code, 0)
         total_score -= room_count * 1500
 
         if day_usage >= 2:
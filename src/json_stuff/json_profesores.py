@@ -1,22 +1,23 @@
 from typing import Dict, Any, Optional, List
 import json
 import asyncio
+import threading
 import aiofiles
 from pathlib import Path 
 import os
-from dataclasses import dataclass
-from datetime import datetime
+import time
+from dataclasses import dataclass, field
 
 @dataclass
 class ProfessorScheduleUpdate:
     nombre: str
     schedule_data: Dict[str, Any]
     asignaturas: List[Any]
-    timestamp: datetime = datetime.now()
+    timestamp: int = field(default_factory=time.monotonic_ns)
 
 class ProfesorScheduleStorage:
     _instance = None
-    _lock = asyncio.Lock()
+    _init_lock = threading.Lock()
     WRITE_THRESHOLD = 20
 
     def __init__(self):
@@ -36,13 +37,19 @@ class ProfesorScheduleStorage:
         print(f"[DEBUG] Output path set to {self._output_path}")
 
     @classmethod
-    async def get_instance(cls) -> 'ProfesorScheduleStorage':
-        if not cls._instance:
-            async with cls._lock:
-                if not cls._instance:
+    def instance(cls) -> 'ProfesorScheduleStorage':
+        """Synchronous accessor; the lock is only taken on first init"""
+        if cls._instance is None:
+            with cls._init_lock:
+                if cls._instance is None:
                     cls._instance = cls()
         return cls._instance
 
+    @classmethod
+    async def get_instance(cls) -> 'ProfesorScheduleStorage':
+        """Kept for backward compatibility, prefer instance()"""
+        return cls.instance()
+
     async def update_schedule(self, nombre: str, schedule_data: Dict[str, Any], asignaturas: List[Any]) -> None:
         """Add or update a professor's schedule"""
         try:
@@ -67,6 +74,8 @@ class ProfesorScheduleStorage:
 
     async def _write_updates_to_file(self) -> None:
         """Write updates to file - assumes lock is already held"""
+        # asyncio.Lock is not reentrant: callers own _write_lock, never re-acquire it here
+        assert self._write_lock.locked()
         try:
             if not self._all_updates:
                 return
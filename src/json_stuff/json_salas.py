@@ -1,62 +1,236 @@
-from typing import Dict, Any, Optional, List
-import json
+from typing import Dict, Any, Optional, List, Callable, Set
 import asyncio
+import threading
+import logging
+import inspect
 import aiofiles
 from pathlib import Path
 import os
-from dataclasses import dataclass
-from datetime import datetime
+import time
+import sys
+from dataclasses import dataclass, field
+from src.objects.static.agent_enums import Day
 
-@dataclass
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+    import json
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - gzip fallback
+    zstandard = None
+    import gzip
+
+logger = logging.getLogger(__name__)
+
+# Resolved once per process; output dirs are only created the first time they are seen
+_CWD = Path(os.getcwd())
+_ensured_dirs: Set[Path] = set()
+
+def _ensure_dir(path: Path) -> None:
+    if path not in _ensured_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _ensured_dirs.add(path)
+
+# Block numbers are 1-based; sized well above any real per-day block count
+_BLOCK_IDX = tuple(range(1, 64))
+# Day is a str enum, so both Day members and plain day names hit this table
+_DAY_INTERN = {d.value: sys.intern(d.value) for d in Day}
+
+def _dumps_json(obj: Any) -> bytes:
+    """Serialize obj to indented UTF-8 JSON bytes (non-ASCII kept unescaped)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+def _dumps_json_line(obj: Any) -> bytes:
+    """Serialize obj to a single compact line of UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _indent_spool_lines(lines: List[bytes]) -> bytes:
+    """Re-indent compact spool lines as the items of an indent=2 JSON array"""
+    loads = orjson.loads if orjson is not None else json.loads
+    return b",\n".join(b"  " + _dumps_json(loads(line)).replace(b"\n", b"\n  ") for line in lines)
+
+WRITE_CHUNK_SIZE = 64 * 1024
+
+async def _write_chunked(f, data: bytes, chunk: int = WRITE_CHUNK_SIZE) -> None:
+    """Write data in filesystem-block sized slices without copying it"""
+    view = memoryview(data)
+    for i in range(0, len(view), chunk):
+        await f.write(view[i:i + chunk])
+
+def _dict_fields(assignment: Dict[str, Any]) -> tuple:
+    """Accessor for assignments serialized with AsignacionSala.to_dict()"""
+    return (assignment['nombre_asignatura'], assignment['capacidad'],
+            assignment['satisfaccion'], assignment.get('profesor'))
+
+def _attr_fields(assignment: Any) -> tuple:
+    """Accessor for live AsignacionSala structs held by sala agents"""
+    return (assignment.nombre_asignatura, assignment.capacidad,
+            assignment.satisfaccion, assignment.profesor)
+
+@dataclass(slots=True)
 class ScheduleUpdate:
+    """Room schedule stored column-wise: one list per output field"""
     codigo: str
     campus: str
-    schedule_data: Dict[str, Any]
-    timestamp: datetime = datetime.now()
+    nombres: List[str] = field(default_factory=list)
+    capacidades: List[Any] = field(default_factory=list)
+    bloques: List[int] = field(default_factory=list)
+    dias: List[str] = field(default_factory=list)
+    satisfacciones: List[int] = field(default_factory=list)
+    docentes: List[Optional[str]] = field(default_factory=list)
+    timestamp: int = field(default_factory=time.monotonic_ns)
+
+    @classmethod
+    def from_horario(cls, codigo: str, campus: str, horario: Dict[Any, List[Any]],
+                     fields: Callable[[Any], tuple] = _dict_fields) -> 'ScheduleUpdate':
+        """Walk the nested horario once, appending each assignment into the column buffers"""
+        update = cls(codigo, campus)
+        for day, assignments in horario.items():
+            dia = _DAY_INTERN.get(day, day)
+            for block_idx, assignment in zip(_BLOCK_IDX, assignments):
+                if assignment:
+                    nombre, capacidad, satisfaccion, profesor = fields(assignment)
+                    update.nombres.append(nombre)
+                    update.capacidades.append(capacidad)
+                    update.bloques.append(block_idx)
+                    update.dias.append(dia)
+                    update.satisfacciones.append(satisfaccion)
+                    update.docentes.append(profesor)
+        return update
+
+    @classmethod
+    def from_schedule_data(cls, codigo: str, campus: str, schedule_data: Dict[str, Any]) -> 'ScheduleUpdate':
+        return cls.from_horario(codigo, campus, schedule_data.get("horario", {}))
+
+    def __len__(self) -> int:
+        return len(self.nombres)
+
+def _build_sala_json(update: ScheduleUpdate, with_docente: bool = False) -> Dict[str, Any]:
+    """Single builder for the per-room output object used by every writer"""
+    if with_docente:
+        asignaturas = [
+            {"Nombre": n, "Capacidad": c, "Bloque": b, "Dia": d, "Satisfaccion": s, "Docente": p}
+            for n, c, b, d, s, p in zip(update.nombres, update.capacidades, update.bloques,
+                                        update.dias, update.satisfacciones, update.docentes)
+        ]
+    else:
+        asignaturas = [
+            {"Nombre": n, "Capacidad": c, "Bloque": b, "Dia": d, "Satisfaccion": s}
+            for n, c, b, d, s in zip(update.nombres, update.capacidades, update.bloques,
+                                     update.dias, update.satisfacciones)
+        ]
+    return {"Codigo": update.codigo, "Campus": update.campus, "Asignaturas": asignaturas}
+
+def _compressed_suffix() -> str:
+    return '.json.zst' if zstandard is not None else '.json.gz'
+
+def _compress_file(path: Path) -> Path:
+    """Replace a JSON file with its zstd (or gzip) compressed sibling; runs in a worker thread"""
+    target = path.with_suffix(_compressed_suffix())
+    data = path.read_bytes()
+    if zstandard is not None:
+        compressed = zstandard.ZstdCompressor(level=3, threads=-1).compress(data)
+    else:
+        compressed = gzip.compress(data, compresslevel=6)
+    tmp_path = target.with_suffix(target.suffix + '.tmp')
+    tmp_path.write_bytes(compressed)
+    os.replace(tmp_path, target)
+    path.unlink()
+    return target
+
+async def _collect_room(sala_agent: Any) -> tuple:
+    """Read (codigo, campus, horario) from a sala agent, awaiting getters that are coroutines"""
+    values = [sala_agent.get_codigo(), sala_agent.get_campus(), sala_agent.get_horario_ocupado()]
+    for i, value in enumerate(values):
+        if inspect.isawaitable(value):
+            values[i] = await value
+    return tuple(values)
+
+def _emit_sala(buf: bytearray, update: ScheduleUpdate) -> None:
+    """Append one room as compact JSON to buf without building the nested room object"""
+    buf += b'{"Codigo":'
+    buf += _dumps_json_line(update.codigo)
+    buf += b',"Campus":'
+    buf += _dumps_json_line(update.campus)
+    buf += b',"Asignaturas":['
+    first = True
+    for n, c, b, d, s in zip(update.nombres, update.capacidades, update.bloques,
+                             update.dias, update.satisfacciones):
+        if not first:
+            buf += b','
+        first = False
+        buf += _dumps_json_line({"Nombre": n, "Capacidad": c, "Bloque": b, "Dia": d, "Satisfaccion": s})
+    buf += b']}'
+
+def _encode_spool_lines(updates: List[ScheduleUpdate]) -> bytes:
+    """Build the NDJSON payload for a batch of updates; runs in a worker thread"""
+    buf = bytearray()
+    for update in updates:
+        _emit_sala(buf, update)
+        buf += b"\n"
+    return bytes(buf)
 
 class SalaScheduleStorage:
-    _instance = None
-    _lock = asyncio.Lock()
     WRITE_THRESHOLD = 20
     JSON_BASE_NAME = "Horarios_salas.json"
+    # Compress the final file once it grows past this many bytes; None keeps plain JSON,
+    # which final_validator.py and exportClassroomSchedule.py read directly
+    COMPRESSION_THRESHOLD: Optional[int] = None
+    SPOOL_BASE_NAME = "Horarios_salas.ndjson"
 
     def __init__(self):
         self._pending_updates: Dict[str, ScheduleUpdate] = {}
-        self._all_room_codes = set()
         self._update_count = 0
         self._write_lock = asyncio.Lock()
-        self._output_path = Path(os.getcwd()) / "agent_output"
-        self._output_path.mkdir(exist_ok=True)
+        self._output_path = _CWD / "agent_output"
+        _ensure_dir(self._output_path)
+        # Append-only NDJSON spool: one line per flushed room update
+        self._spool_file = None
+        # Spool detached by set_scenario; closing is async, so the next flush closes it
+        self._stale_spool_file = None
+        self._reset_spool()
         
+    def _reset_spool(self) -> None:
+        """Forget the spool index; the next flush closes the old spool and truncates the new one"""
+        if self._spool_file is not None:
+            self._stale_spool_file, self._spool_file = self._spool_file, None
+        self._spool_codes: List[str] = []
+        self._spool_latest: Dict[str, int] = {}
+        self._spool_truncated = False
+
     def set_scenario(self, scenario: str) -> None:
         """Set the scenario for output path"""
-        self._output_path = Path(os.getcwd()) / "agent_output" / scenario
-        self._output_path.mkdir(parents=True, exist_ok=True)
-        print(f"[DEBUG] Output path set to {self._output_path}")
+        self._output_path = _CWD / "agent_output" / scenario
+        _ensure_dir(self._output_path)
+        # A new output path starts its own spool, call this before the first update
+        self._reset_spool()
+        logger.debug("Output path set to %s", self._output_path)
 
     @classmethod
-    async def get_instance(cls) -> 'SalaScheduleStorage':
-        if not cls._instance:
-            async with cls._lock:
-                if not cls._instance:
-                    cls._instance = cls()
-        return cls._instance
+    def get_instance(cls) -> 'SalaScheduleStorage':
+        global _instance
+        if _instance is None:
+            with _init_lock:
+                if _instance is None:
+                    _instance = cls()
+        return _instance
 
     async def update_schedule(self, codigo: str, campus: str, schedule_data: Dict[str, Any]) -> None:
         """Add or update a room's schedule"""
         try:
-            print(f"[DEBUG] Adding/updating schedule for room {codigo}")
-            assignment_count = sum(
-                1 for day_assignments in schedule_data["horario"].values()
-                for assignment in day_assignments if assignment
-            )
-            print(f"[DEBUG] Room {codigo} has {assignment_count} total assignments")
-
-            update = ScheduleUpdate(codigo, campus, schedule_data)
+            update = ScheduleUpdate.from_schedule_data(codigo, campus, schedule_data)
+            # The column buffers already hold the count, no extra walk of the horario
+            logger.debug("Room %s has %d total assignments", codigo, len(update))
             
             async with self._write_lock:
                 self._pending_updates[codigo] = update
-                self._all_room_codes.add(codigo)
                 self._update_count += 1
 
                 if self._update_count >= self.WRITE_THRESHOLD:
@@ -67,101 +241,120 @@ class SalaScheduleStorage:
             raise
 
     async def _write_updates_to_file(self) -> None:
-        """Write updates to file without acquiring additional locks"""
+        """Append pending updates to the NDJSON spool without acquiring additional locks"""
+        # asyncio.Lock is not reentrant: callers own _write_lock, never re-acquire it here
+        assert self._write_lock.locked()
+        if not self._pending_updates:
+            return
+
+        # Detach the pending map up front so the snapshot can be serialized off the event loop
+        updates, self._pending_updates = self._pending_updates, {}
+        update_count, self._update_count = self._update_count, 0
+        spool_end = None
         try:
-            if not self._pending_updates:
-                return
-
-            json_array = []
-            for update in self._pending_updates.values():
-                sala_json = {
-                    "Codigo": update.codigo,
-                    "Campus": update.campus,
-                    "Asignaturas": []
-                }
-
-                if "horario" in update.schedule_data:
-                    for day, assignments in update.schedule_data["horario"].items():
-                        for block_idx, assignment in enumerate(assignments, 1):
-                            if assignment:
-                                asignatura = {
-                                    "Nombre": assignment['nombre_asignatura'],
-                                    "Capacidad": assignment['capacidad'],
-                                    "Bloque": block_idx,
-                                    "Dia": day,
-                                    "Satisfaccion": assignment['satisfaccion']
-                                }
-                                sala_json["Asignaturas"].append(asignatura)
-
-                json_array.append(sala_json)
-
-            if json_array:
-                output_file = self._output_path / self.JSON_BASE_NAME
-                async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
-                    await f.write(json.dumps(json_array, indent=2, ensure_ascii=False))
-                print(f"Successfully wrote {len(self._pending_updates)} classroom schedules to file")
-
-            self._pending_updates.clear()
-            self._update_count = 0
+            if self._spool_file is None:
+                # A spool left open for an earlier scenario is closed before this one opens
+                await self._close_spool()
+                # Only the first flush of this run truncates a stale spool, reopening after
+                # generate_json_file must append so the line indices stay valid
+                mode = 'ab' if self._spool_truncated else 'wb'
+                self._spool_file = await aiofiles.open(self._output_path / self.SPOOL_BASE_NAME, mode,
+                                                       buffering=WRITE_CHUNK_SIZE)
+                self._spool_truncated = True
+
+            spool_end = await self._spool_file.tell()
+            payload = await asyncio.to_thread(_encode_spool_lines, list(updates.values()))
+            await _write_chunked(self._spool_file, payload)
+            await self._spool_file.flush()
+
+            for codigo in updates:
+                self._spool_latest[codigo] = len(self._spool_codes)
+                self._spool_codes.append(codigo)
+            print(f"Successfully spooled {len(updates)} classroom schedules to file")
 
         except Exception as e:
+            if spool_end is not None:
+                await self._rewind_spool(spool_end)
+            # Put the snapshot back so the next flush retries it
+            for codigo, update in updates.items():
+                self._pending_updates.setdefault(codigo, update)
+            self._update_count += update_count
             print(f"Error writing classroom schedules to file: {str(e)}")
             raise
 
+    async def _close_spool(self) -> None:
+        """Close the spool writer so it can be read back"""
+        for spool_file in (self._spool_file, self._stale_spool_file):
+            if spool_file is not None:
+                await spool_file.close()
+        self._spool_file = self._stale_spool_file = None
+
+    async def _rewind_spool(self, size: int) -> None:
+        """Cut the spool back to size after a failed write, so its lines keep matching _spool_codes"""
+        spool_file, self._spool_file = self._spool_file, None
+        try:
+            # Closing flushes whatever the failed write left buffered, the truncate drops it
+            await spool_file.close()
+        except Exception as e:
+            logger.debug("Closing the spool after a failed write: %s", e)
+        await asyncio.to_thread(os.truncate, self._output_path / self.SPOOL_BASE_NAME, size)
+
     async def generate_json_file(self) -> None:
         """Generate final JSON file with all room schedules"""
         try:
             async with self._write_lock:
-                print(f"[DEBUG] Processing {len(self._all_room_codes)} rooms")
-                json_array = []
-                
-                for room_code in self._all_room_codes:
-                    try:
-                        update = self._pending_updates.get(room_code)
-                        if update:
-                            sala_json = {
-                                "Codigo": update.codigo,
-                                "Campus": update.campus,
-                                "Asignaturas": []
-                            }
-                            
-                            if "horario" in update.schedule_data:
-                                for day, assignments in update.schedule_data["horario"].items():
-                                    for block_idx, assignment in enumerate(assignments, 1):
-                                        if assignment:
-                                            asignatura = {
-                                                "Nombre": assignment['nombre_asignatura'],
-                                                "Capacidad": assignment['capacidad'],
-                                                "Bloque": block_idx,
-                                                "Dia": day,
-                                                "Satisfaccion": assignment['satisfaccion']
-                                            }
-                                            sala_json["Asignaturas"].append(asignatura)
-                                            
-                            json_array.append(sala_json)
-                            print(f"[DEBUG] Processed room {room_code}: {len(sala_json['Asignaturas'])} assignments")
-                        else:
-                            print(f"[WARN] No data found for room {room_code}")
-                            
-                    except Exception as e:
-                        print(f"[ERROR] Error processing room {room_code}: {str(e)}")
-                        continue
+                await self._write_updates_to_file()
+                logger.debug("Processing %d rooms", len(self._spool_latest))
+                await self._close_spool()
 
-                if json_array:
-                    try:
-                        output_file = self._output_path / self.JSON_BASE_NAME
-                        async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
-                            await f.write(json.dumps(json_array, indent=2, ensure_ascii=False))
-                            await f.flush()
-                            
-                        print(f"[SUCCESS] Generated {self.JSON_BASE_NAME} with {len(json_array)} rooms")
-                        if output_file.exists():
-                            print(f"[DEBUG] File size: {output_file.stat().st_size} bytes")
-                        
-                    except Exception as e:
-                        print(f"[ERROR] Error writing output file: {str(e)}")
-                else:
+                if not self._spool_codes:
                     print("[WARN] No room data to write")
+                    return
+
+                try:
+                    spool_path = self._output_path / self.SPOOL_BASE_NAME
+                    output_file = self._output_path / self.JSON_BASE_NAME
+                    room_count = 0
+                    # Stream the spool into the same indent=2 JSON array as before the spool,
+                    # keeping only the latest line per room; re-indenting runs off the loop
+                    tmp_path = output_file.with_suffix('.json.tmp')
+                    async with aiofiles.open(spool_path, 'rb', buffering=WRITE_CHUNK_SIZE) as src, \
+                            aiofiles.open(tmp_path, 'wb', buffering=WRITE_CHUNK_SIZE) as f:
+                        await f.write(b"[\n")
+                        kept: List[bytes] = []
+                        kept_size = 0
+                        line_idx = 0
+                        async for line in src:
+                            codigo = self._spool_codes[line_idx]
+                            if self._spool_latest[codigo] == line_idx:
+                                kept.append(line)
+                                kept_size += len(line)
+                                if kept_size >= WRITE_CHUNK_SIZE:
+                                    if room_count:
+                                        await f.write(b",\n")
+                                    await f.write(await asyncio.to_thread(_indent_spool_lines, kept))
+                                    room_count += len(kept)
+                                    kept = []
+                                    kept_size = 0
+                            line_idx += 1
+                        if kept:
+                            if room_count:
+                                await f.write(b",\n")
+                            await f.write(await asyncio.to_thread(_indent_spool_lines, kept))
+                            room_count += len(kept)
+                        await f.write(b"\n]")
+                        await f.flush()
+                        await asyncio.to_thread(os.fsync, f.fileno())
+                    # Readers only ever see the previous file or the complete new one
+                    await asyncio.to_thread(os.replace, tmp_path, output_file)
+                    output_file = await self._maybe_compress(output_file)
+
+                    print(f"[SUCCESS] Generated {output_file.name} with {room_count} rooms")
+                    if logger.isEnabledFor(logging.DEBUG) and output_file.exists():
+                        logger.debug("File size: %d bytes", output_file.stat().st_size)
+
+                except Exception as e:
+                    print(f"[ERROR] Error writing output file: {str(e)}")
 
         except Exception as e:
             print(f"[ERROR] Critical error in generate_json_file: {str(e)}")
@@ -182,14 +375,7 @@ class SalaScheduleStorage:
             await self._write_updates_to_file()
             
             for codigo, update in self._pending_updates.items():
-                assignment_count = 0
-                if "horario" in update.schedule_data:
-                    for day, assignments in update.schedule_data["horario"].items():
-                        for assignment in assignments:
-                            if assignment:
-                                assignment_count += 1
-                
-                print(f"Room {codigo}: {assignment_count} assignments")
+                print(f"Room {codigo}: {len(update)} assignments")
     
     async def generate_supervisor_final_report(self, sala_agents: List[Any]) -> None:
         """Generate comprehensive final report by querying all sala agents directly
@@ -201,75 +387,42 @@ class SalaScheduleStorage:
         try:
             print(f"[SUPERVISOR] Generating comprehensive final report for {len(sala_agents)} classrooms")
             
+            # Fan out to all sala agents at once; they are read-only here so no lock is needed
+            results = await asyncio.gather(
+                *(_collect_room(sala_agent) for sala_agent in sala_agents),
+                return_exceptions=True
+            )
+
+            debug_lines = []
             async with self._write_lock:
                 json_array = []
                 all_room_data = {}
                 
-                # First collect all data directly from sala agents
-                for sala_agent in sala_agents:
+                # First use the data collected directly from sala agents
+                for result in results:
+                    if isinstance(result, BaseException):
+                        print(f"[SUPERVISOR] Error accessing sala agent: {str(result)}")
+                        continue
                     try:
-                        room_code = sala_agent.get_codigo()
-                        campus = sala_agent.get_campus()
-                        horario = sala_agent.get_horario_ocupado()
-                        
+                        room_code, campus, horario = result
                         all_room_data[room_code] = horario
                         
-                        sala_json = {
-                            "Codigo": room_code,
-                            "Campus": campus,
-                            "Asignaturas": []
-                        }
-                        
-                        # Process the schedule
-                        assignment_count = 0
-                        for day, assignments in horario.items():
-                            for block_idx, assignment in enumerate(assignments, 1):
-                                if assignment:
-                                    assignment_count += 1
-                                    asignatura = {
-                                        "Nombre": assignment.get_nombre_asignatura(),
-                                        "Capacidad": assignment.get_capacidad(),
-                                        "Bloque": block_idx,
-                                        "Dia": day,
-                                        "Satisfaccion": assignment.get_satisfaccion(),
-                                        "Docente": assignment.get_profesor()
-                                    }
-                                    sala_json["Asignaturas"].append(asignatura)
-                        
-                        json_array.append(sala_json)
-                        print(f"[SUPERVISOR] Retrieved data for room {room_code} - Found {assignment_count} assignments")
+                        update = ScheduleUpdate.from_horario(room_code, campus, horario, _attr_fields)
+                        json_array.append(_build_sala_json(update, with_docente=True))
+                        debug_lines.append(f"{room_code}:{len(update)}")
                     
                     except Exception as e:
                         print(f"[SUPERVISOR] Error accessing sala agent: {str(e)}")
                 
                 # If we didn't get all rooms, add the ones we know about from our tracking
-                for room_code in self._all_room_codes:
+                # Rooms are known either from unflushed updates or from the spool index
+                for room_code in dict.fromkeys([*self._pending_updates, *self._spool_latest]):
                     if room_code not in all_room_data:
                         # Get from pending updates if available
                         update = self._pending_updates.get(room_code)
                         if update:
-                            sala_json = {
-                                "Codigo": update.codigo,
-                                "Campus": update.campus,
-                                "Asignaturas": []
-                            }
-                            
-                            if "horario" in update.schedule_data:
-                                for day, assignments in update.schedule_data["horario"].items():
-                                    for block_idx, assignment in enumerate(assignments, 1):
-                                        if assignment:
-                                            asignatura = {
-                                                "Nombre": assignment.get_nombre_asignatura(),
-                                                "Capacidad": assignment.get_capacidad(),
-                                                "Bloque": block_idx, 
-                                                "Dia": day.capitalize(),
-                                                "Satisfaccion": assignment.get_satisfaccion(),
-                                                "Docente": assignment.get_profesor()
-                                            }
-                                            sala_json["Asignaturas"].append(asignatura)
-                            
-                            json_array.append(sala_json)
-                            print(f"[SUPERVISOR] Used pending update data for room {room_code}")
+                            json_array.append(_build_sala_json(update, with_docente=True))
+                            debug_lines.append(f"{room_code}:pending")
                         else:
                             # Create empty entry as last resort
                             sala_json = {
@@ -278,13 +431,19 @@ class SalaScheduleStorage:
                                 "Asignaturas": []
                             }
                             json_array.append(sala_json)
-                            print(f"[SUPERVISOR] Created empty entry for room {room_code}")
+                            debug_lines.append(f"{room_code}:empty")
                 
                 # Write to file
                 if json_array:
                     output_file = self._output_path / self.JSON_BASE_NAME
-                    async with aiofiles.open(output_file, 'w', encoding='utf-8') as f:
-                        await f.write(json.dumps(json_array, indent=2, ensure_ascii=False))
+                    payload = await asyncio.to_thread(_dumps_json, json_array)
+                    tmp_path = output_file.with_suffix('.json.tmp')
+                    async with aiofiles.open(tmp_path, 'wb', buffering=WRITE_CHUNK_SIZE) as f:
+                        await _write_chunked(f, payload)
+                        await f.flush()
+                        await asyncio.to_thread(os.fsync, f.fileno())
+                    await asyncio.to_thread(os.replace, tmp_path, output_file)
+                    output_file = await self._maybe_compress(output_file)
                     
                     # Count total assignments
                     total_assignments = sum(
@@ -292,27 +451,39 @@ class SalaScheduleStorage:
                         for sala in json_array
                     )
                     
-                    print(f"[SUPERVISOR] Generated {self.JSON_BASE_NAME} with {len(json_array)} salas and {total_assignments} total assignments with scenario {self._output_path.name}")
+                    print(f"[SUPERVISOR] Generated {output_file.name} with {len(json_array)} salas and {total_assignments} total assignments with scenario {self._output_path.name}")
+
+            # One summary line once the lock is released instead of a print per room
+            logger.debug("Processed rooms: %s", " ".join(debug_lines))
         
         except Exception as e:
             print(f"[ERROR] Error in generate_supervisor_final_report: {str(e)}")
             raise
     
+    async def _maybe_compress(self, output_file: Path) -> Path:
+        """Compress the final file when it crosses COMPRESSION_THRESHOLD, returning the written path"""
+        if self.COMPRESSION_THRESHOLD is None:
+            return output_file
+        if output_file.stat().st_size <= self.COMPRESSION_THRESHOLD:
+            # Drop a compressed file left by an earlier, larger run so it cannot shadow this one
+            output_file.with_suffix(_compressed_suffix()).unlink(missing_ok=True)
+            return output_file
+        return await asyncio.to_thread(_compress_file, output_file)
+
     def get_final_json_path(self) -> Path:
-        """Get the path to the final JSON file"""
-        return self._output_path / self.JSON_BASE_NAME
+        """Get the path to the final JSON file, which may be the compressed variant"""
+        plain = self._output_path / self.JSON_BASE_NAME
+        compressed = plain.with_suffix(_compressed_suffix())
+        if not plain.exists() and compressed.exists():
+            return compressed
+        return plain
     
     def is_json_file_generated(self) -> bool:
         """Check if the JSON file has been generated"""
         file_path = self.get_final_json_path()
         return file_path.exists() and file_path.is_file()
-    
-    @staticmethod
-    def _count_assignments(horario: Dict[str, List[Dict[str, Any]]]) -> int:
-        """Helper method to count assignments in a horario"""
-        count = 0
-        for day_list in horario.values():
-            for assignment in day_list:
-                if assignment:
-                    count += 1
-        return count
\ No newline at end of file
+
+# Module-level singleton; a threading lock is only taken on first init and,
+# unlike a class-level asyncio.Lock, is not bound to the importing event loop
+_instance: Optional[SalaScheduleStorage] = None
+_init_lock = threading.Lock()
@@ -1,9 +1,10 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
+import msgspec
+import sys
 from .static.agent_enums import Day, Actividad, translate_actividad
 
-@dataclass
-class Asignatura:
+class Asignatura(msgspec.Struct, frozen=True, gc=False):
     nombre: str
     nivel: int
     paralelo: str
@@ -16,63 +17,32 @@ class Asignatura:
     def __str__(self) -> str:
         return f"{self.nombre},{self.nivel},{self.paralelo},{self.horas},{self.vacantes},{self.campus},{self.codigo_asignatura}"
 
-    # lets implement getters
-    def get_nombre(self) -> str:
-        return self.nombre
-    
-    def get_nivel(self) -> int:
-        return self.nivel
-    
-    def get_paralelo(self) -> str:
-        return self.paralelo
-    
-    def get_horas(self) -> int:
-        return self.horas
-    
-    def get_vacantes(self) -> int:
-        return self.vacantes
-    
-    def get_campus(self) -> str:
-        return self.campus
-    
-    def get_codigo_asignatura(self) -> str:
-        return self.codigo_asignatura
-    
-    def get_actividad(self) -> Actividad:
-        return self.actividad
-
     @staticmethod
     def from_json(json_obj: dict) -> 'Asignatura':
+        # Actividad comes as a short code ("teo", "lab"...), so it can't go through msgspec.convert
         return Asignatura(
-            nombre=json_obj["Nombre"],
-            nivel=int(json_obj["Nivel"]),
-            paralelo=json_obj["Paralelo"],
-            horas=int(json_obj["Horas"]),
-            vacantes=int(json_obj["Vacantes"]),
-            campus=json_obj["Campus"],
-            codigo_asignatura=json_obj["CodigoAsignatura"],
-            actividad=translate_actividad(json_obj["Actividad"])
+            json_obj["Nombre"],
+            int(json_obj["Nivel"]),
+            json_obj["Paralelo"],
+            int(json_obj["Horas"]),
+            int(json_obj["Vacantes"]),
+            sys.intern(json_obj["Campus"]),
+            sys.intern(json_obj["CodigoAsignatura"]),
+            translate_actividad(json_obj["Actividad"])
         )
 
-@dataclass
-class AsignacionSala:
+    @staticmethod
+    def from_json_list(json_objs: List[dict]) -> List['Asignatura']:
+        """Bulk variant of from_json for an agent's whole subject list"""
+        from_json = Asignatura.from_json
+        return [from_json(o) for o in json_objs]
+
+class AsignacionSala(msgspec.Struct, frozen=True, gc=False):
     nombre_asignatura: str
     satisfaccion: int
     capacidad: float
     profesor: Optional[str] = None
 
-    def get_nombre_asignatura(self) -> str:
-        return self.nombre_asignatura
-
-    def get_satisfaccion(self) -> int:
-        return self.satisfaccion
-
-    def get_capacidad(self) -> float:
-        return self.capacidad
-    
-    def get_profesor(self) -> Optional[str]:
-        return self.profesor
-    
     def to_dict(self) -> dict:
         return {
             "nombre_asignatura": self.nombre_asignatura,
@@ -81,7 +51,7 @@ class AsignacionSala:
             "profesor": self.profesor
         }
 
-@dataclass
+@dataclass(slots=True)
 class AssignationData:
     ultimo_dia_asignado: Optional[Day] = None
     sala_asignada: Optional[str] = None
@@ -112,33 +82,9 @@ class AssignationData:
     def get_ultimo_bloque_asignado(self) -> int:
         return self.ultimo_bloque_asignado
 
-@dataclass
-class BloqueInfo:
+class BloqueInfo(msgspec.Struct, frozen=True, gc=False):
     campus: str
     bloque: int
 
     def __str__(self) -> str:
         return f"BloqueInfo{{campus='{self.campus}', bloque={self.bloque}}}"
-
-    def __eq__(self, other: object) -> bool:
-        if not isinstance(other, BloqueInfo):
-            return False
-        return (self.bloque == other.bloque and 
-                self.campus == other.campus)
-
-    def __hash__(self) -> int:
-        result = hash(self.campus) if self.campus else 0
-        result = 31 * result + self.bloque
-        return result
-
-    def get_campus(self) -> str:
-        return self.campus
-
-    def get_bloque(self) -> int:
-        return self.bloque
-
-    def set_campus(self, campus: str) -> None:
-        self.campus = campus
-
-    def set_bloque(self, bloque: int) -> None:
-        self.bloque = bloque
\ No newline at end of file
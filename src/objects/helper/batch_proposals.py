@@ -2,12 +2,16 @@ from dataclasses import dataclass
 from typing import Dict, List, Optional
 from enum import Enum
 from spade.message import Message
-from collections import defaultdict
 from ..static.agent_enums import Day
 from .classroom_availability import ClassroomAvailability
 import msgspec
+import sys
 
-class BlockProposal(msgspec.Struct):
+# Sala agents key available_blocks by Day.name
+_DAY_BY_NAME = {d.name: d for d in Day}
+
+# gc=False: only holds an int and an enum, so it never forms reference cycles
+class BlockProposal(msgspec.Struct, frozen=True, gc=False):
     block: int
     day: Day
 
@@ -16,18 +20,12 @@ class BlockProposal(msgspec.Struct):
             "block": self.block,
             "day": self.day.name
         }
-        
-    def get_block(self) -> int:
-        return self.block
-    
-    def get_day(self) -> Day:
-        return self.day
 
     @classmethod
     def from_dict(cls, data: dict) -> "BlockProposal":
         return cls(
             block=data["block"],
-            day=Day[data["day"]]
+            day=_DAY_BY_NAME[data["day"]]
         )
 
 class BatchProposal(msgspec.Struct, kw_only=True):
@@ -38,27 +36,6 @@ class BatchProposal(msgspec.Struct, kw_only=True):
     original_message: Message
     day_proposals: Dict[Day, List[BlockProposal]]
 
-    def get_day_proposals(self) -> Dict[Day, List[BlockProposal]]:
-        return dict(self.day_proposals)
-
-    def get_room_code(self) -> str:
-        return self.room_code
-
-    def get_campus(self) -> str:
-        return self.campus
-
-    def get_capacity(self) -> int:
-        return self.capacity
-
-    def get_satisfaction_score(self) -> int:
-        return self.satisfaction_score
-
-    def get_original_message(self) -> Message:
-        return self.original_message
-
-    def set_satisfaction_score(self, score: int) -> None:
-        self.satisfaction_score = score
-
     def to_dict(self) -> dict:
         """Convert the BatchProposal to a dictionary for serialization"""
         return {
@@ -75,18 +52,17 @@ class BatchProposal(msgspec.Struct, kw_only=True):
     @classmethod
     def from_dict(cls, data: dict, message: Message) -> "BatchProposal":
         """Create a BatchProposal from a dictionary and message"""
-        # Create a minimal ClassroomAvailability for initialization
-        availability = type("ClassroomAvailability", (), {
-            "codigo": data["room_code"],
-            "campus": data["campus"],
-            "capacidad": data["capacity"],
-            "available_blocks": {
+        availability = ClassroomAvailability(
+            codigo=data["room_code"],
+            campus=data["campus"],
+            capacidad=data["capacity"],
+            available_blocks={
                 day_str: [b["block"] for b in blocks]
                 for day_str, blocks in data["day_proposals"].items()
             }
-        })
+        )
 
-        proposal = cls(availability, message)
+        proposal = cls.from_availability(availability, message)
         proposal.satisfaction_score = data["satisfaction_score"]
         return proposal
     
@@ -95,16 +71,19 @@ class BatchProposal(msgspec.Struct, kw_only=True):
         # return cls(availability, message)
         # now this is a struct
         # create a minimal ClassroomAvailability for initialization
+        day_proposals = {}
+        for day_str, blocks in availability.available_blocks.items():
+            day = _DAY_BY_NAME[day_str]
+            day_proposals[day] = [BlockProposal(block=b, day=day) for b in blocks]
+
         return BatchProposal(
-            room_code=availability.codigo,
-            campus=availability.campus,
+            # Codes and campuses repeat across every proposal of a round
+            room_code=sys.intern(availability.codigo),
+            campus=sys.intern(availability.campus),
             capacity=availability.capacidad,
             satisfaction_score=0,
             original_message=message,
-            day_proposals={
-                day: [BlockProposal(block=block, day=day) for block in blocks]
-                for day, blocks in availability.available_blocks.items()
-            }
+            day_proposals=day_proposals
         )
     
     # create the same method but consider the availability as a dictionary
@@ -116,4 +95,4 @@ class BatchProposal(msgspec.Struct, kw_only=True):
             capacidad=availability["capacidad"],
             available_blocks=availability["available_blocks"]
         )
-        return cls(availability_obj, message)
\ No newline at end of file
+        return cls.from_availability(availability_obj, message)
\ No newline at end of file
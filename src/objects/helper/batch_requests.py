@@ -3,7 +3,30 @@ from typing import List
 from ..static.agent_enums import Day
 import msgspec
 
-class AssignmentRequest(msgspec.Struct):
+class RoomRequest(msgspec.Struct, frozen=True, gc=False):
+    """
+    Body of the CFP a professor sends to every candidate room.
+
+    Attributes:
+        nombre (str): Sanitized name of the subject
+        vacantes (int): Number of students
+        nivel (int): Subject level
+        campus (str): Campus the subject is taught on
+        bloques_pendientes (int): Blocks still to be assigned
+        sala_asignada (str): Room already holding the subject, "" if none
+        ultimo_dia (str): Day.name of the last assigned block, "" if none
+        ultimo_bloque (int): Last assigned block, -1 if none
+    """
+    nombre: str
+    vacantes: int
+    nivel: int = 0
+    campus: str = ""
+    bloques_pendientes: int = 0
+    sala_asignada: str = ""
+    ultimo_dia: str = ""
+    ultimo_bloque: int = -1
+
+class AssignmentRequest(msgspec.Struct, frozen=True, gc=False):
     """
     A request for assigning a subject to a specific day/block/classroom.
     
@@ -21,32 +44,17 @@ class AssignmentRequest(msgspec.Struct):
     satisfaction: int
     classroom_code: str
     vacancy: int
-    prof_name: str = None  # Optional attribute for professor name
+    # Optional attribute for professor name, "professor" on the wire
+    prof_name: str = msgspec.field(default=None, name="professor")
 
     def to_dict(self) -> dict:
         """Convert the request to a dictionary for serialization."""
-        return {
-            "day": self.day.name,
-            "block": self.block,
-            "subject_name": self.subject_name,
-            "satisfaction": self.satisfaction,
-            "classroom_code": self.classroom_code,
-            "vacancy": self.vacancy,
-            "professor": self.prof_name
-        }
+        return msgspec.to_builtins(self)
 
     @classmethod
     def from_dict(cls, data: dict) -> "AssignmentRequest":
         """Create an AssignmentRequest instance from a dictionary."""
-        return cls(
-            day=Day[data["day"]],
-            block=data["block"],
-            subject_name=data["subject_name"],
-            satisfaction=data["satisfaction"],
-            classroom_code=data["classroom_code"],
-            vacancy=data["vacancy"],
-            prof_name=data.get("professor")
-        )
+        return msgspec.convert(data, cls)
 
 class BatchAssignmentRequest(msgspec.Struct):
     """
@@ -58,24 +66,12 @@ class BatchAssignmentRequest(msgspec.Struct):
     def __init__(self, assignments: List[AssignmentRequest]):
         self.assignments = assignments """
 
-    def get_assignments(self) -> List[AssignmentRequest]:
-        """Get the list of assignment requests."""
-        return self.assignments
-
     def to_dict(self) -> dict:
         """Convert the batch request to a dictionary for serialization."""
-        return {
-            "assignments": [
-                assignment.to_dict() 
-                for assignment in self.assignments
-            ]
-        }
+        return msgspec.to_builtins(self)
 
     @classmethod
     def from_dict(cls, data: dict) -> "BatchAssignmentRequest":
         """Create a BatchAssignmentRequest instance from a dictionary."""
-        assignments = [
-            AssignmentRequest.from_dict(assignment_data)
-            for assignment_data in data["assignments"]
-        ]
-        return cls(assignments)
\ No newline at end of file
+        # Validates and builds the whole tree in C, Day included
+        return msgspec.convert(data, cls)
@@ -1,6 +1,5 @@
 from dataclasses import dataclass
 from typing import Dict, List
-import jsonpickle
 import msgspec
 
 class ClassroomAvailability(msgspec.Struct):
@@ -18,31 +17,15 @@ class ClassroomAvailability(msgspec.Struct):
     capacidad: int
     available_blocks: Dict[str, List[int]]
 
-    def get_codigo(self) -> str:
-        """Get the classroom code."""
-        return self.codigo
-
-    def get_campus(self) -> str:
-        """Get the campus name."""
-        return self.campus
-
-    def get_capacidad(self) -> int:
-        """Get the classroom capacity."""
-        return self.capacidad
-
-    def get_available_blocks(self) -> Dict[str, List[int]]:
-        """Get the dictionary of available blocks by day."""
-        return self.available_blocks
-
     def save_to_file(self, filename: str) -> None:
         """
-        Save the classroom availability data to a file using pickle.
+        Save the classroom availability data to a file using msgpack.
         
         Args:
             filename (str): The name of the file to save to
         """
         with open(filename, 'wb') as f:
-            jsonpickle.dumps(self, f)
+            f.write(_ENCODER.encode(self))
 
     @classmethod
     def load_from_file(cls, filename: str) -> 'ClassroomAvailability':
@@ -56,7 +39,7 @@ class ClassroomAvailability(msgspec.Struct):
             ClassroomAvailability: The loaded classroom availability instance
         """
         with open(filename, 'rb') as f:
-            return jsonpickle.loads(f.read())
+            return _DECODER.decode(f.read())
 
     def __str__(self) -> str:
         """Return a string representation of the classroom availability."""
@@ -76,4 +59,7 @@ class ClassroomAvailability(msgspec.Struct):
             'campus': self.campus,
             'capacidad': self.capacidad,
             'available_blocks': self.available_blocks
-        }
\ No newline at end of file
+        }
+
+_ENCODER = msgspec.msgpack.Encoder()
+_DECODER = msgspec.msgpack.Decoder(ClassroomAvailability)
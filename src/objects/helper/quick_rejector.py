@@ -1,29 +1,50 @@
-from typing import Dict
+from typing import Dict, Iterable, Tuple
 from dataclasses import dataclass
-from datetime import datetime
-import asyncio
-from math import ceil
+import numpy as np
 
-@dataclass
-class QuickRejectCacheEntry:
-    """Cache entry for room quick reject decisions"""
-    subject_code: str
-    room_id: str
-    should_reject: bool
-    timestamp: datetime = datetime.now()
+# Campus names encoded as small ints so room batches can be compared in numpy
+_CAMPUS_IDS: Dict[str, int] = {}
+
+def campus_id(campus: str) -> int:
+    return _CAMPUS_IDS.setdefault(campus, len(_CAMPUS_IDS))
+
+@dataclass(frozen=True, slots=True)
+class SubjectRejectContext:
+    """Subject-only half of the reject decision, computed once per subject"""
+    code: str
+    campus: str
+    vacancies: int
+    needs_meeting_room: bool
+    # Smallest acceptable capacity: ceil(0.8 * v) for meeting rooms, v otherwise
+    min_capacity: int
 
 class RoomQuickRejectFilter:
     """Optimization filter for quickly rejecting unsuitable rooms"""
     MEETING_ROOM_THRESHOLD = 10
     
-    def __init__(self):
-        self._cache: Dict[str, QuickRejectCacheEntry] = {}
-        self._lock = asyncio.Lock()
-        
-    def _get_cache_key(self, subject_code: str, room_id: str) -> str:
-        """Generate cache key from subject and room IDs"""
-        return f"{subject_code}-{room_id}"
-        
+    def build_subject_ctx(self, subject) -> SubjectRejectContext:
+        """Hoist the subject-dependent parts of the decision out of the room loop"""
+        vacancies = subject.vacantes
+        needs_meeting_room = vacancies < self.MEETING_ROOM_THRESHOLD
+        return SubjectRejectContext(
+            code=subject.codigo_asignatura,
+            campus=subject.campus,
+            vacancies=vacancies,
+            needs_meeting_room=needs_meeting_room,
+            min_capacity=(4 * vacancies + 4) // 5 if needs_meeting_room else vacancies
+        )
+
+    def can_quick_reject_ctx(self,
+                             ctx: SubjectRejectContext,
+                             room_campus: str,
+                             room_capacity: int) -> bool:
+        """Same decision as can_quick_reject, with the subject side precomputed"""
+        return (
+            room_campus != ctx.campus
+            or (room_capacity < self.MEETING_ROOM_THRESHOLD) != ctx.needs_meeting_room
+            or room_capacity < ctx.min_capacity
+        )
+
     def can_quick_reject(self, 
                              subject_name: str,
                              subject_code: str, 
@@ -47,39 +68,52 @@ class RoomQuickRejectFilter:
         Returns:
             bool: True if room can be rejected, False if it needs full evaluation
         """
-        cache_key = self._get_cache_key(subject_code, room_code)
-        
-        if not cache_key in self._cache:
-            # Quick reject conditions
-            should_reject = False
-            
-            # Campus mismatch
-            if room_campus != subject_campus:
-                should_reject = True
-                
-            else:
-                # Meeting room logic
-                subject_needs_meeting_room = subject_vacancies < self.MEETING_ROOM_THRESHOLD
-                is_meeting_room = room_capacity < self.MEETING_ROOM_THRESHOLD
-                
-                # Reject if meeting room requirements don't match
-                if subject_needs_meeting_room != is_meeting_room:
-                    should_reject = True
-                    
-                # For meeting rooms, be more lenient with capacity
-                elif is_meeting_room:
-                    should_reject = room_capacity < ceil(subject_vacancies * 0.8)
-                    
-                # For regular rooms
-                else:
-                    should_reject = room_capacity < subject_vacancies
-                    
-            # Cache the result
-            self._cache[cache_key] = QuickRejectCacheEntry(
-                subject_code=subject_code,
-                room_id=room_code,
-                should_reject=should_reject
-            )
-            
-            return should_reject
-        return self._cache[cache_key].should_reject
\ No newline at end of file
+        # Only static subject and room attributes are involved, so nothing is cached
+        needs_meeting_room = subject_vacancies < self.MEETING_ROOM_THRESHOLD
+        # Past the second test room and subject agree on meeting-room-ness, so the
+        # capacity floor only depends on the subject; meeting rooms get 80% leniency
+        return (
+            room_campus != subject_campus
+            or (room_capacity < self.MEETING_ROOM_THRESHOLD) != needs_meeting_room
+            or room_capacity < ((4 * subject_vacancies + 4) // 5 if needs_meeting_room else subject_vacancies)
+        )
+
+    @staticmethod
+    def pack_rooms(rooms: Iterable[Tuple[str, int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Pack (campus, capacity) pairs into campus-id and capacity columns"""
+        rooms = list(rooms)
+        campus_ids = np.fromiter((campus_id(c) for c, _ in rooms), dtype=np.int16, count=len(rooms))
+        capacities = np.fromiter((cap for _, cap in rooms), dtype=np.int32, count=len(rooms))
+        return campus_ids, capacities
+
+    def can_quick_reject_batch(self,
+                               subject_campus: str,
+                               subject_vacancies: int,
+                               room_campus_ids: np.ndarray,
+                               room_capacities: np.ndarray) -> np.ndarray:
+        """
+        Same decision as can_quick_reject, evaluated for every room at once
+
+        Returns:
+            np.ndarray: boolean mask, True where the room can be rejected
+        """
+        needs_meeting_room = subject_vacancies < self.MEETING_ROOM_THRESHOLD
+        is_meeting_room = room_capacities < self.MEETING_ROOM_THRESHOLD
+        return ((room_campus_ids != campus_id(subject_campus))
+                | (is_meeting_room != needs_meeting_room)
+                | (is_meeting_room & (room_capacities * 5 < subject_vacancies * 4))
+                | (~is_meeting_room & (room_capacities < subject_vacancies)))
+
+    def filter_rooms(self,
+                     ctx: SubjectRejectContext,
+                     room_campus_ids: np.ndarray,
+                     room_capacities: np.ndarray) -> np.ndarray:
+        """
+        Vectorized can_quick_reject_ctx over packed room columns
+
+        Returns:
+            np.ndarray: boolean mask, True where the room can be rejected
+        """
+        return ((room_campus_ids != campus_id(ctx.campus))
+                | ((room_capacities < self.MEETING_ROOM_THRESHOLD) != ctx.needs_meeting_room)
+                | (room_capacities < ctx.min_capacity))
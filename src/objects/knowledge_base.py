@@ -1,26 +1,80 @@
-from typing import Dict, List, Optional, Set
-from dataclasses import dataclass
+from typing import DefaultDict, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from itertools import count
+from operator import attrgetter
 import asyncio
-from datetime import datetime, timedelta
-import json
+import sys
+from datetime import datetime
 from aioxmpp import JID
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+    import json
+
 # from performance.df_analysis import DFOperation, DFMetricsTracker
 import time
 
-@dataclass
+def _freeze(value):
+    """Hashable stand-in for a property value, tagged so a list never equals a tuple"""
+    if isinstance(value, list):
+        return (list, tuple(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return (dict, frozenset((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+@dataclass(frozen=True, slots=True)
 class AgentCapability:
     """Represents an agent's capabilities and properties"""
     service_type: str
     properties: Dict[str, any]
     last_updated: datetime
+    _hash: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    _updated_iso: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # The same few service types and property names repeat across every agent and index entry
+        object.__setattr__(self, "service_type", sys.intern(self.service_type))
+        object.__setattr__(self, "properties", {
+            sys.intern(k) if type(k) is str else k: v for k, v in self.properties.items()
+        })
+
+    def __hash__(self) -> int:
+        # Computed once; capabilities are never changed after registration
+        h = self._hash
+        if h is None:
+            try:
+                props = frozenset(self.properties.items())
+            except TypeError:
+                # Unhashable values (e.g. lists), keys alone still agree with __eq__
+                props = frozenset(self.properties)
+            h = hash((self.service_type, props, self.last_updated))
+            object.__setattr__(self, "_hash", h)
+        return h
 
-@dataclass
+    @property
+    def last_updated_iso(self) -> str:
+        iso = self._updated_iso
+        if iso is None:
+            iso = self.last_updated.isoformat()
+            object.__setattr__(self, "_updated_iso", iso)
+        return iso
+
+@dataclass(slots=True)
 class AgentInfo:
     """Complete information about an agent"""
     jid: JID
-    capabilities: List[AgentCapability]
-    last_heartbeat: datetime
+    jid_str: str  # str(jid), stringifying an aioxmpp JID isn't free
+    capabilities: Tuple[AgentCapability, ...]  # fixed once registered
+    last_heartbeat: float  # time.monotonic()
+    last_heartbeat_iso: str  # wall-clock time of the same heartbeat, for export
+    order: int = 0  # registration sequence, kept across re-registrations like the _agents dict order
+
+_by_order = attrgetter("order")
 
 class AgentKnowledgeBase:
     """
@@ -30,60 +84,80 @@ class AgentKnowledgeBase:
     _instance = None
     _instance_lock = asyncio.Lock()
     _initialized = False
+    CACHE_SIZE = 4096
 
     def __init__(self, ttl_seconds: int = 300):
         self._agents: Dict[str, AgentInfo] = {}
-        self._capabilities: Dict[str, Set[str]] = {}  # service_type -> set of JIDs
-        self._ttl = timedelta(seconds=ttl_seconds)
+        # service_type -> set of JIDs, emptied sets are deleted on removal
+        self._capabilities: DefaultDict[str, Set[str]] = defaultdict(set)
+        # (service_type, property key, property value) -> set of JIDs
+        self._property_index: DefaultDict[Tuple[str, str, Hashable], Set[str]] = defaultdict(set)
+        self._ttl = float(ttl_seconds)
+        # Single lock for all writers, readers never take it. The locked bodies never
+        # await, so on one event loop per-JID shards would not add any concurrency
         self._register_lock = asyncio.Lock()
-        self._search_lock = asyncio.Lock()
         self._cleanup_task = None
-        self._cache = {}
+        # LRU of search results, keys carry the generation of the searched service type
+        self._cache: OrderedDict[tuple, List[AgentInfo]] = OrderedDict()
+        # Bumped on every (de)registration touching a service type; None covers unfiltered searches
+        self._gen: Dict[Optional[str], int] = defaultdict(int)
+        self._order_seq = count()
 
     @classmethod
     async def get_instance(cls) -> 'AgentKnowledgeBase':
         if not cls._instance:
             async with cls._instance_lock:
                 if not cls._instance:
-                    cls._instance = cls()
-                    if not cls._initialized:
-                        await cls._instance.start()
-                        cls._initialized = True
+                    instance = cls()
+                    await instance.start()
+                    cls._initialized = True
+                    # Published only once started, so no caller sees a half-built instance
+                    cls._instance = instance
         return cls._instance
     
-    def __new__(cls):
-        if not cls._instance:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
-    def __make_hashable(self, obj):
-        """Convert a dictionary into a hashable format"""
-        if isinstance(obj, dict):
-            return frozenset((k, self.__make_hashable(v)) for k, v in sorted(obj.items()))
-        elif isinstance(obj, list):
-            return tuple(self.__make_hashable(elem) for elem in obj)
-        elif isinstance(obj, set):
-            return frozenset(self.__make_hashable(elem) for elem in obj)
-        return obj
-    
-    def _generate_cache_key(self, agent_id: str, operation: str, params: Dict) -> str:
-        """Generate a cache key from parameters"""
+    def _query_key(self, agent_id: str, operation: str, service_type: Optional[str],
+                   properties: Optional[Dict]) -> Optional[tuple]:
+        """Cache key for a query, None if its properties can't be hashed"""
         try:
-            hashable_params = self.__make_hashable(params)
-            return f"{agent_id}:{operation}:{hash(hashable_params)}"
-        except Exception:
-            # Fallback if hashing fails
-            return f"{agent_id}:{operation}:{datetime.now().timestamp()}"
+            # frozenset(items) is order independent like dict equality, _freeze covers list values
+            props_key = frozenset((k, _freeze(v)) for k, v in properties.items()) if properties else None
+            hash(props_key)
+        except TypeError:
+            return None
+        return (agent_id, operation, service_type, self._gen.get(service_type, 0), props_key)
+
+    def _generate_cache_key(self, agent_id: str, operation: str, params: Dict) -> Optional[tuple]:
+        """Generate a cache key from parameters, None if they can't be hashed"""
+        return self._query_key(agent_id, operation, params.get("service_type"), params.get("properties"))
+
+    def _cache_get(self, cache_key: tuple):
+        result = self._cache.get(cache_key)
+        if result is not None:
+            self._cache.move_to_end(cache_key)
+        return result
+
+    def _cache_put(self, cache_key: tuple, result) -> None:
+        self._cache[cache_key] = result
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
 
     def check_cache(self, agent_id: str, operation: str, params: Dict) -> Optional[Dict]:
         """Check if operation result is in cache"""
         cache_key = self._generate_cache_key(agent_id, operation, params)
-        return self._cache.get(cache_key)
+        return self._cache_get(cache_key) if cache_key is not None else None
 
     def update_cache(self, agent_id: str, operation: str, params: Dict, result: Dict):
         """Update cache with operation result"""
         cache_key = self._generate_cache_key(agent_id, operation, params)
-        self._cache[cache_key] = result
+        if cache_key is not None:
+            self._cache_put(cache_key, result)
+
+    def _bump_generations(self, capabilities: Iterable[AgentCapability]) -> None:
+        """Invalidate cached searches over the given capabilities' service types"""
+        gen = self._gen
+        gen[None] += 1
+        for cap in capabilities:
+            gen[cap.service_type] += 1
 
     async def start(self):
         """Start the knowledge base and its maintenance tasks"""
@@ -108,122 +182,164 @@ class AgentKnowledgeBase:
             finally:
                 self._cleanup_task = None """
 
+    def _index_properties(self, jid_str: str, capabilities: Iterable[AgentCapability]) -> None:
+        for cap in capabilities:
+            for key, value in cap.properties.items():
+                try:
+                    self._property_index[(cap.service_type, key, _freeze(value))].add(jid_str)
+                except TypeError:
+                    # Values that can't be frozen are only reachable through the scan
+                    pass
+
+    def _unindex_properties(self, jid_str: str, capabilities: Iterable[AgentCapability]) -> None:
+        for cap in capabilities:
+            for key, value in cap.properties.items():
+                try:
+                    entry = (cap.service_type, key, _freeze(value))
+                    jids = self._property_index.get(entry)
+                except TypeError:
+                    continue
+                if jids is not None:
+                    jids.discard(jid_str)
+                    if not jids:
+                        del self._property_index[entry]
+
     async def register_agent(self, jid: JID, capabilities: List[AgentCapability]) -> bool:
         """Enhanced registration with DF metrics tracking"""
-        start_time = time.perf_counter()
-        # agent_id = str(jid).split("@")[0]  # Extract agent name from JID
-        
-        try:
-            async with self._register_lock:
-                # Update agent info
-                self._agents[str(jid)] = AgentInfo(
-                    jid=jid,
-                    capabilities=capabilities,
-                    last_heartbeat=datetime.now()
-                )
-                
-                # Update capability indices
-                for cap in capabilities:
-                    if cap.service_type not in self._capabilities:
-                        self._capabilities[cap.service_type] = set()
-                    self._capabilities[cap.service_type].add(str(jid))
-                
-                # Calculate response time
-                end_time = time.perf_counter()
-                response_time = (end_time - start_time) * 1000
-                
-                return True
-                
-        except Exception as e:
-            end_time = time.perf_counter()
-            response_time = (end_time - start_time) * 1000
-            raise
+        jid_str = str(jid)
+        capabilities = tuple(capabilities)
+        async with self._register_lock:
+            previous = self._agents.get(jid_str)
+            if previous is not None:
+                self._unindex_properties(jid_str, previous.capabilities)
+                self._bump_generations(previous.capabilities)
+
+            # Update agent info
+            self._agents[jid_str] = AgentInfo(
+                jid=jid,
+                jid_str=jid_str,
+                capabilities=capabilities,
+                last_heartbeat=time.monotonic(),
+                last_heartbeat_iso=datetime.now().isoformat(),
+                order=previous.order if previous is not None else next(self._order_seq)
+            )
+            
+            # Update capability indices
+            for cap in capabilities:
+                self._capabilities[cap.service_type].add(jid_str)
+            self._index_properties(jid_str, capabilities)
+            self._bump_generations(capabilities)
+            
+            return True
+
+    def _evict(self, jid_str: str) -> Optional[AgentInfo]:
+        """Drop an agent and its index entries, the caller holds _register_lock"""
+        agent_info = self._agents.pop(jid_str, None)
+        if agent_info is None:
+            return None
+
+        # Remove from capability indices
+        capabilities = self._capabilities
+        for cap in agent_info.capabilities:
+            jids = capabilities.get(cap.service_type)
+            if jids is not None:
+                jids.discard(jid_str)
+                if not jids:
+                    del capabilities[cap.service_type]
+
+        self._unindex_properties(jid_str, agent_info.capabilities)
+        self._bump_generations(agent_info.capabilities)
+        return agent_info
 
     async def deregister_agent(self, jid: JID) -> bool:
         """Enhanced deregistration with DF metrics tracking"""
-        start_time = time.perf_counter()
-        agent_id = str(jid).split("@")[0]
-        
+        return await self._deregister_by_str(str(jid))
+
+    async def _deregister_by_str(self, jid_str: str) -> bool:
+        # No deadline here: _register_lock is only ever held for synchronous updates,
+        # callers that need one can wrap the call in asyncio.wait_for
         try:
-            async with asyncio.timeout(10):
-                async with self._register_lock:
-                    jid_str = str(jid)
-                    if jid_str not in self._agents:
-                        return False
-
-                    # Remove from capability indices
-                    agent_info = self._agents[jid_str]
-                    num_capabilities = 0
-                    for cap in agent_info.capabilities:
-                        if cap.service_type in self._capabilities:
-                            self._capabilities[cap.service_type].discard(jid_str)
-                            num_capabilities += 1
-                            if not self._capabilities[cap.service_type]:
-                                del self._capabilities[cap.service_type]
-
-                    # Remove agent info
-                    del self._agents[jid_str]
-                    
-                    # Calculate response time
-                    end_time = time.perf_counter()
-                    response_time = (end_time - start_time) * 1000
-                    
-                    return True
+            async with self._register_lock:
+                return self._evict(jid_str) is not None
         except Exception as e:
-            end_time = time.perf_counter()
-            response_time = (end_time - start_time) * 1000
-            
             # raise custom exception or log error
-            raise Exception(f"Error deregistering agent {jid}: {str(e)}")
+            raise Exception(f"Error deregistering agent {jid_str}: {str(e)}")
+
+    def _indexed_candidates(self, service_type: str, properties: Dict[str, any]) -> Optional[Set[str]]:
+        """JIDs having every requested property on some capability, None if a value can't be looked up.
+
+        A superset: the properties may be spread over several capabilities of the service type,
+        so candidates still go through _matches.
+        """
+        index = self._property_index
+        try:
+            sets = [index.get((service_type, key, _freeze(value))) for key, value in properties.items()]
+        except TypeError:
+            return None
+        if any(s is None for s in sets):
+            return set()
+        # Smallest posting set first, the intersection never grows past it
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    @staticmethod
+    def _matches(agent: AgentInfo, service_type: Optional[str], properties: Dict[str, any]) -> bool:
+        """True if a single capability of the service type has every requested property"""
+        for cap in agent.capabilities:
+            if cap.service_type == service_type:
+                cap_props = cap.properties
+                if all(key in cap_props and cap_props[key] == value for key, value in properties.items()):
+                    return True
+        return False
+
+    def _scan(self, service_type: Optional[str], properties: Optional[Dict[str, any]]) -> List[AgentInfo]:
+        """Linear match, for queries the property index can't answer"""
+        agents = self._agents
+        if not service_type:
+            # Iterating _agents itself already yields registration order
+            if not properties:
+                return list(agents.values())
+            return [agent for agent in agents.values() if self._matches(agent, service_type, properties)]
+
+        candidates = [agent for agent in map(agents.get, self._capabilities.get(service_type, ())) if agent is not None]
+        # Listing queries (every agent of a type) need no per-agent checks
+        if properties:
+            candidates = [agent for agent in candidates if self._matches(agent, service_type, properties)]
+        candidates.sort(key=_by_order)
+        return candidates
 
     async def search(self, service_type: Optional[str] = None, properties: Optional[Dict[str, any]] = None) -> List[AgentInfo]:
         """Enhanced search with DF metrics tracking"""
-        # start_time = time.perf_counter()
         agent_id = properties.get("agent_id", "unknown") if properties else "unknown"
+        if service_type:
+            service_type = sys.intern(service_type)
         
         try:
-            # Check cache first
-            cache_params = {"service_type": service_type, "properties": properties}
-            cached_result = self.check_cache(agent_id, "search", cache_params)
-            
-            if cached_result:
-                return cached_result
+            # Check cache first, the key is built once and reused to store the result
+            cache_key = self._query_key(agent_id, "search", service_type, properties)
+            if cache_key is not None:
+                cached_result = self._cache_get(cache_key)
+                if cached_result is not None:
+                    return cached_result
 
-            # async with self._search_lock:
-            results = []
-            candidate_jids = (self._capabilities.get(service_type, set()) 
-                            if service_type else set(self._agents.keys()))
-            
-            for jid_str in candidate_jids:
-                agent = self._agents.get(jid_str)
-                if not agent:
-                    continue
-                    
-                if properties:
-                    for cap in agent.capabilities:
-                        if cap.service_type == service_type:
-                            matches = all(
-                                key in cap.properties and cap.properties[key] == value
-                                for key, value in properties.items()
-                            )
-                            if matches:
-                                results.append(agent)
-                                break
-                else:
-                    results.append(agent)
-
-            # Calculate response time
-            # end_time = time.perf_counter()
-            # response_time = (end_time - start_time) * 1000
-            
-            self.update_cache(agent_id, "search", cache_params, results)
+            # No lock: nothing below awaits, so registrations can't interleave with it
+            indexed = self._indexed_candidates(service_type, properties) if service_type and properties else None
+            if indexed is not None:
+                # Same predicate as the scan, the index only narrows down who gets checked
+                agents = self._agents
+                matches = self._matches
+                results = [agent for agent in map(agents.__getitem__, indexed)
+                           if matches(agent, service_type, properties)]
+                results.sort(key=_by_order)
+            else:
+                results = self._scan(service_type, properties)
+
+            if cache_key is not None:
+                self._cache_put(cache_key, results)
             
             return results
             
         except Exception as e:
-            # end_time = time.perf_counter()
-            # response_time = (end_time - start_time) * 1000
-            
             raise Exception(f"Error searching for agents: {str(e)}")
     
     """
@@ -238,68 +354,81 @@ class AgentKnowledgeBase:
             except Exception as e:
                 print(f"Error in cleanup loop: {e}") """
 
-    async def _cleanup_expired(self):
-        """Remove agents that haven't sent heartbeats within TTL"""
+    async def _cleanup_expired(self) -> int:
+        """Remove agents that haven't sent heartbeats within TTL, returns how many were removed"""
         async with self._register_lock:
-            now = datetime.now()
-            expired = []
-            
-            for jid_str, info in self._agents.items():
-                if now - info.last_heartbeat > self._ttl:
-                    expired.append(JID.fromstr(jid_str))
+            now = time.monotonic()
+            ttl = self._ttl
+            expired = [jid_str for jid_str, info in self._agents.items() if now - info.last_heartbeat > ttl]
             
-            for jid in expired:
-                await self.deregister_agent(jid)
+            # One pass with no awaits, so no registration can interleave with the eviction
+            for jid_str in expired:
+                self._evict(jid_str)
+            return len(expired)
 
     async def export_state(self) -> str:
         """Export current state as JSON string"""
-        async with self._register_lock:
-            state = {
-                "agents": {
-                    jid: {
-                        "capabilities": [
-                            {
-                                "service_type": cap.service_type,
-                                "properties": cap.properties,
-                                "last_updated": cap.last_updated.isoformat()
-                            }
-                            for cap in info.capabilities
-                        ],
-                        "last_heartbeat": info.last_heartbeat.isoformat()
-                    }
-                    for jid, info in self._agents.items()
+        # Like search, the snapshot is built without awaiting so no writer can run mid-copy
+        state = self._snapshot_state_nolock()
+        # The snapshot only shares immutable values, so serializing it can't race either
+        if orjson is not None:
+            return orjson.dumps(state).decode("utf-8")
+        return json.dumps(state, ensure_ascii=False, separators=(",", ":"))
+
+    def _snapshot_state_nolock(self) -> Dict:
+        return {
+            "agents": {
+                jid: {
+                    "capabilities": [
+                        {
+                            "service_type": cap.service_type,
+                            "properties": dict(cap.properties),
+                            "last_updated": cap.last_updated_iso
+                        }
+                        for cap in info.capabilities
+                    ],
+                    "last_heartbeat": info.last_heartbeat_iso
                 }
+                for jid, info in self._agents.items()
             }
-            return json.dumps(state, indent=2)
+        }
 
     @classmethod
     async def import_state(cls, state_json: str) -> 'AgentKnowledgeBase':
         """Create new knowledge base instance from exported state"""
+        # A standalone instance, the singleton is only ever built by get_instance
         kb = cls()
-        state = json.loads(state_json)
+        state = orjson.loads(state_json) if orjson is not None else json.loads(state_json)
+        wall_offset = time.time() - time.monotonic()
+        by_service: Dict[str, List[str]] = defaultdict(list)
         
         async with kb._register_lock:
             for jid_str, agent_data in state["agents"].items():
-                capabilities = [
+                capabilities = tuple(
                     AgentCapability(
                         service_type=cap["service_type"],
                         properties=cap["properties"],
                         last_updated=datetime.fromisoformat(cap["last_updated"])
                     )
                     for cap in agent_data["capabilities"]
-                ]
+                )
                 
                 kb._agents[jid_str] = AgentInfo(
                     jid=JID.fromstr(jid_str),
+                    jid_str=jid_str,
                     capabilities=capabilities,
-                    last_heartbeat=datetime.fromisoformat(agent_data["last_heartbeat"])
+                    last_heartbeat=datetime.fromisoformat(agent_data["last_heartbeat"]).timestamp() - wall_offset,
+                    last_heartbeat_iso=agent_data["last_heartbeat"],
+                    order=next(kb._order_seq)
                 )
                 
-                # Rebuild capability indices
                 for cap in capabilities:
-                    if cap.service_type not in kb._capabilities:
-                        kb._capabilities[cap.service_type] = set()
-                    kb._capabilities[cap.service_type].add(jid_str)
+                    by_service[cap.service_type].append(jid_str)
+                kb._index_properties(jid_str, capabilities)
+
+            # Rebuild capability indices, one bulk update per service type
+            for service_type, jids in by_service.items():
+                kb._capabilities[service_type].update(jids)
                     
         return kb
     
@@ -308,4 +437,5 @@ class AgentKnowledgeBase:
         """Reset the singleton instance (useful for testing)"""
         if cls._instance:
             await cls._instance.stop()
-            cls._instance = None
\ No newline at end of file
+            cls._instance = None
+        cls._initialized = False
\ No newline at end of file
@@ -1,5 +1,6 @@
 # import enums
 from enum import Enum
+from functools import lru_cache
 
 class TipoContrato(Enum):
     JORNADA_COMPLETA = 0
@@ -24,6 +25,8 @@ ACTIVIDAD_MAPPING = {
 }
 
 # Move the translation function outside the Enum
+# Only a handful of distinct activity strings show up in the input data
+@lru_cache(maxsize=64)
 def translate_actividad(activity: str) -> Actividad:
     return ACTIVIDAD_MAPPING.get(activity.lower(), Actividad.TEORIA)
 
@@ -46,11 +49,15 @@ class Day(str, Enum):
 
     @classmethod
     def from_string(cls, day : str):
-        try:
-            return cls[day.upper()]
-        except KeyError:
-            # Handle display names
-            for d in cls:
-                if d.value.lower() == day.lower():
-                    return d
-            raise ValueError(f"No matching day found for: {day}")
\ No newline at end of file
+        d = _DAY_LOOKUP.get(day)
+        if d is None:
+            d = _DAY_LOOKUP.get(day.lower())
+        if d is None:
+            raise ValueError(f"No matching day found for: {day}")
+        return d
+
+# Case-insensitive lookup over both member names and display names
+_DAY_LOOKUP = {name.lower(): member for name, member in Day.__members__.items()}
+_DAY_LOOKUP.update({d.value.lower(): d for d in Day})
+# Data usually spells days exactly like the members, that hit skips the lower() call
+_DAY_LOOKUP.update({d.value: d for d in Day})
\ No newline at end of file
@@ -8,69 +8,87 @@ import time
 from datetime import datetime
 import asyncio
 import os
+from typing import Optional
 from spade.agent import Agent
 FILE_PATH = os.path.dirname(os.path.abspath(__file__))
 # GO TWO DIRECTORIES UP
 OUTPUT_DIR = os.path.abspath(os.path.join(FILE_PATH, "..", "..", "agent_output", "Metrics"))
 
+class _MetricsPatch:
+    """Wraps an agent coroutine method and logs how long each call took"""
+    __slots__ = ("_monitor", "_agent_name", "_action_type", "_orig")
+
+    def __init__(self, monitor: ActionsMonitor, agent_name: str, action_type: str, orig):
+        self._monitor = monitor
+        self._agent_name = agent_name
+        self._action_type = action_type
+        self._orig = orig
+
+    async def __call__(self, *args, **kwargs):
+        # Wall clock only stamps the start, the duration comes from the monotonic counter
+        start_time = time.time()
+        start_ns = time.perf_counter_ns()
+        try:
+            return await self._orig(*args, **kwargs)
+        finally:
+            await self._monitor.log_request(
+                self._agent_name,
+                self._action_type,
+                start_time,
+                start_time + (time.perf_counter_ns() - start_ns) / 1e9
+            )
+
 class AgentFactory:
+    # When False patch_agent leaves agents untouched
+    METRICS_ENABLED = True
+
     def __init__(self, scenario: str = "small"):
         # get todays date
         today = datetime.now()
 
-        mas_metrics_file = f"mas_metrics_{today.strftime('%Y-%m-%d_%H-%M-%S')}.csv"
-        request_metrics_file = f"request_metrics_{today.strftime('%Y-%m-%d_%H-%M-%S')}.csv"
+        stamp = today.strftime('%Y-%m-%d_%H-%M-%S')
         self.scenario = scenario
         
         # set scenario in metrics monitor
-        mas_metrics_file = os.path.join(OUTPUT_DIR, scenario, mas_metrics_file)
-        request_metrics_file = os.path.join(OUTPUT_DIR, scenario, request_metrics_file)
+        self._scenario_dir = os.path.join(OUTPUT_DIR, scenario)
+        self._mas_metrics_file = os.path.join(self._scenario_dir, f"mas_metrics_{stamp}.csv")
+        self._request_metrics_file = os.path.join(self._scenario_dir, f"request_metrics_{stamp}.csv")
         
-        if not os.path.exists(os.path.join(OUTPUT_DIR, scenario)):
-            os.makedirs(os.path.join(OUTPUT_DIR, scenario), exist_ok=True)
+        os.makedirs(self._scenario_dir, exist_ok=True)
         
-        self.metrics_monitor = ActionsMonitor(
-            output_file=mas_metrics_file,
-            request_log_file=request_metrics_file
-        )
+        # Process-wide monitor, only taken in start() so a factory can be built off the loop
+        self.metrics_monitor: Optional[ActionsMonitor] = None
         
-        asyncio.create_task(self.metrics_monitor.start())
-        # asyncio.create_task(CentralizedPerformanceMonitor.initialize(self.scenario))
+        # Background tasks are kept here so they can't be garbage collected mid-run
+        self._bg_tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        """Start the metrics monitor, needs a running event loop"""
+        # Raises ValueError if another factory already set the monitor up for other files
+        self.metrics_monitor = ActionsMonitor.instance(
+            output_file=self._mas_metrics_file,
+            request_log_file=self._request_metrics_file
+        )
+        await self.metrics_monitor.start()
+        if self.metrics_monitor.flush_task is not None:
+            self._bg_tasks.append(self.metrics_monitor.flush_task)
+        # self._bg_tasks.append(asyncio.create_task(CentralizedPerformanceMonitor.initialize(self.scenario)))
+
+    async def stop(self):
+        """Stop the metrics monitor, flushing what it still buffers"""
+        if self.metrics_monitor is not None:
+            await self.metrics_monitor.stop()
+        self._bg_tasks.clear()
         
     def patch_agent(self, agent: Agent, agent_type: str, agent_name: str):
-        # assume it is registering
-        original_start = agent.start
-        # this is for unregistering
-        original_stop = agent.stop
-        
-        async def start_with_metrics(self, *args, **kwargs):
-            start_time = time.time()
-            try:
-                await original_start(*args, **kwargs)
-            finally:
-                end_time = time.time()
-                await self.metrics_monitor.log_request(
-                    agent_name,
-                    f"{agent_type}_start",
-                    start_time,
-                    end_time
-                )
-        
-        async def stop_with_metrics(self):
-            start_time = time.time()
-            try:
-                await original_stop()
-            finally:
-                end_time = time.time()
-                await self.metrics_monitor.log_request(
-                    agent_name,
-                    f"{agent_type}_stop",
-                    start_time,
-                    end_time
-                )
-                
-        agent.start = start_with_metrics.__get__(agent)
-        agent.stop = stop_with_metrics.__get__(agent)
+        if not self.METRICS_ENABLED:
+            return agent
+        if self.metrics_monitor is None:
+            # The patches keep the monitor they were built with, so it must exist by now
+            raise RuntimeError("AgentFactory.start() must be awaited before patching agents")
+        # start is assumed to be registering, stop unregistering
+        agent.start = _MetricsPatch(self.metrics_monitor, agent_name, f"{agent_type}_start", agent.start)
+        agent.stop = _MetricsPatch(self.metrics_monitor, agent_name, f"{agent_type}_stop", agent.stop)
         
         return agent
 
@@ -4,12 +4,15 @@ from datetime import datetime
 from dataclasses import dataclass
 from typing import Optional, Set
 from pathlib import Path
-from collections import deque
 import json
 from spade.message import Message
 from ..jade_migration.asyncio_singleton import AsyncioSingleton
 
-@dataclass
+# CSV quoting doubles embedded quotes, translate does it in one C pass
+_QUOTE_TRANS = str.maketrans({'"': '""'})
+_ROW_FMT = '{},{},{},{},{},{},{},"{}",{}'.format
+
+@dataclass(slots=True)
 class MessageLogEntry:
     """Single message log entry matching JADE format"""
     timestamp: datetime
@@ -24,29 +27,32 @@ class MessageLogEntry:
 
     def to_csv_row(self) -> str:
         """Convert to CSV row format matching JADE logger"""
-        timestamp_str = self.timestamp.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]  # Truncate to milliseconds
-        
-        # Escape quotes in content
-        escaped_content = self.content.replace('"', '""')
-        
-        return (f'{timestamp_str},{self.agent},{self.agent_action},{self.sender},'
-                f'{self.receivers},{self.performative},{self.conversation_id},'
-                f'"{escaped_content}",{self.sequence_id}')
+        return _ROW_FMT(
+            self.timestamp.isoformat(sep=' ', timespec='milliseconds'),
+            self.agent, self.agent_action, self.sender,
+            self.receivers, self.performative, self.conversation_id,
+            self.content.translate(_QUOTE_TRANS), self.sequence_id
+        )
 
 class AgentMessageLogger(metaclass=AsyncioSingleton):
     """
     SPADE equivalent of JADE's AgentMessageLogger
     Provides singleton message logging with async file operations
     """
+    QUEUE_SIZE = 10000
+    BATCH_SIZE = 100
     
     def __init__(self):
-        self._log_queue: deque = deque()
+        # Bounded so a burst the disk can't keep up with drops entries instead of growing memory
+        self._log_queue: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._drops: int = 0
         self._is_running: bool = False
         self._sequence_counter: int = 0
         self._log_path: Optional[Path] = None
+        # Single consumer (_background_writer) of the queue the loggers put to, no locks needed
         self._writer_task: Optional[asyncio.Task] = None
-        self._lock = asyncio.Lock()
-        self._write_lock = asyncio.Lock()
+        # Kept open from start() to stop(), batches are appended as pre-encoded bytes
+        self._fh = None
     
     async def start(self, scenario: str) -> None:
         """Start the message logger for given scenario"""
@@ -64,8 +70,8 @@ class AgentMessageLogger(metaclass=AsyncioSingleton):
             
             # Write CSV headers
             headers = "timestamp,agent,agentAction,sender,receivers,performative,conversationId,content,sequenceId\n"
-            async with aiofiles.open(self._log_path, 'w') as f:
-                await f.write(headers)
+            self._fh = await aiofiles.open(self._log_path, 'wb')
+            await self._fh.write(headers.encode('utf-8'))
             
             # Start background writer
             self._is_running = True
@@ -80,24 +86,26 @@ class AgentMessageLogger(metaclass=AsyncioSingleton):
     
     async def stop(self) -> None:
         """Stop the message logger"""
-        async with self._lock:
-            if not self._is_running:
-                return
-                
-            self._is_running = False
-            
-            # Cancel writer task and flush remaining entries
-            if self._writer_task:
-                self._writer_task.cancel()
-                try:
-                    await self._writer_task
-                except asyncio.CancelledError:
-                    pass
+        if not self._is_running:
+            return
             
-            await self._flush_remaining_entries()
-            print("SPADE Message Logger stopped")
+        self._is_running = False
+        
+        # The sentinel is queued behind every pending entry, so the writer drains them first
+        if self._writer_task:
+            await self._log_queue.put(None)
+            await self._writer_task
+            self._writer_task = None
+        
+        await self._flush_remaining_entries()
+        if self._fh is not None:
+            await self._fh.close()
+            self._fh = None
+        if self._drops:
+            print(f"SPADE Message Logger dropped {self._drops} entries, queue was full")
+        print("SPADE Message Logger stopped")
     
-    async def log_message_sent(self, agent_name: str, message: Message) -> None:
+    def log_message_sent(self, agent_name: str, message: Message) -> None:
         """Log a message being sent"""
         if not self._is_running:
             return
@@ -120,9 +128,9 @@ class AgentMessageLogger(metaclass=AsyncioSingleton):
             sequence_id=self._get_next_sequence_id()
         )
         
-        self._log_queue.append(entry)
+        self._enqueue(entry)
     
-    async def log_message_received(self, agent_name: str, message: Message) -> None:
+    def log_message_received(self, agent_name: str, message: Message) -> None:
         """Log a message being received"""
         if not self._is_running:
             return
@@ -145,7 +153,13 @@ class AgentMessageLogger(metaclass=AsyncioSingleton):
             sequence_id=self._get_next_sequence_id()
         )
         
-        self._log_queue.append(entry)
+        self._enqueue(entry)
+    
+    def _enqueue(self, entry: MessageLogEntry) -> None:
+        try:
+            self._log_queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self._drops += 1
     
     def _get_next_sequence_id(self) -> int:
         """Get next sequence ID (thread-safe)"""
@@ -154,20 +168,24 @@ class AgentMessageLogger(metaclass=AsyncioSingleton):
     
     async def _background_writer(self) -> None:
         """Background task to write log entries to file"""
+        queue = self._log_queue
         try:
-            while self._is_running or self._log_queue:
-                if not self._log_queue:
-                    await asyncio.sleep(0.1)
-                    continue
+            while True:
+                # Sleeps until something is logged, None means stop
+                entry = await queue.get()
                 
-                # Process entries in batches for efficiency
+                # Process entries in batches for efficiency, up to BATCH_SIZE of what is already queued
                 batch = []
-                for _ in range(min(100, len(self._log_queue))):  # Process up to 100 entries at once
-                    if self._log_queue:
-                        batch.append(self._log_queue.popleft())
+                while entry is not None:
+                    batch.append(entry)
+                    if len(batch) >= self.BATCH_SIZE or queue.empty():
+                        break
+                    entry = queue.get_nowait()
                 
                 if batch:
                     await self._write_batch(batch)
+                if entry is None:
+                    return
                     
         except asyncio.CancelledError:
             # Write remaining entries before cancellation
@@ -178,25 +196,26 @@ class AgentMessageLogger(metaclass=AsyncioSingleton):
     
     async def _write_batch(self, entries: list) -> None:
         """Write a batch of entries to file"""
-        if not entries or not self._log_path:
+        if not entries or self._fh is None:
             return
             
         try:
-            async with self._write_lock:
-                batch_content = "\n".join(entry.to_csv_row() for entry in entries) + "\n"
-                async with aiofiles.open(self._log_path, 'a') as f:
-                    await f.write(batch_content)
+            batch_content = ("\n".join(entry.to_csv_row() for entry in entries) + "\n").encode('utf-8')
+            await self._fh.write(batch_content)
         except Exception as e:
             print(f"Error writing message log batch: {e}")
     
     async def _flush_remaining_entries(self) -> None:
         """Flush any remaining entries in the queue"""
-        if not self._log_queue:
+        if self._log_queue.empty():
             return
             
         try:
-            remaining_entries = list(self._log_queue)
-            self._log_queue.clear()
+            remaining_entries = []
+            while not self._log_queue.empty():
+                entry = self._log_queue.get_nowait()
+                if entry is not None:
+                    remaining_entries.append(entry)
             await self._write_batch(remaining_entries)
         except Exception as e:
             print(f"Error flushing remaining message logs: {e}")
\ No newline at end of file
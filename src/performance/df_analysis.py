@@ -1,9 +1,12 @@
 import csv
+import json
 import asyncio
 import aiofiles
+import pandas as pd
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from dataclasses import dataclass
+from collections import OrderedDict
 from pathlib import Path
 import os
 
@@ -19,12 +22,24 @@ class DFOperation:
 
 class DFMetricsTracker:
     """Tracks metrics for Directory Facilitator operations"""
+    FLUSH_BATCH_SIZE = 100
+    FLUSH_INTERVAL = 0.5  # seconds
+    CACHE_SIZE = 4096
+    CACHE_SHARDS = 16  # power of two, shard index is a mask of the agent hash
     
     def __init__(self, output_file: str = "df_metrics.csv", scenario : str = "small"):
         self.scenario = scenario
         self.output_file = Path("agent_output") / self.scenario / output_file
-        self._lock = asyncio.Lock()
-        self._cache: Dict[str, Dict] = {}  # Simple cache for DF operations
+        # Operations are queued by the hot path and written in batches by _log_flusher,
+        # the only writer of the file, so appends need no lock
+        self._log_q: Optional[asyncio.Queue] = None
+        self._log_task: Optional[asyncio.Task] = None
+        # operation -> [successful count, total response time], seeded by start() and kept up to date by record()
+        self._live_stats: Dict[str, List] = {
+            op: [0, 0.0] for op in ('register', 'deregister', 'search', 'cache_hit')
+        }
+        # LRU cache for DF operations, sharded by agent so each shard resizes and evicts on its own
+        self._cache_shards: List[OrderedDict] = [OrderedDict() for _ in range(self.CACHE_SHARDS)]
         self.output_file.parent.mkdir(parents=True, exist_ok=True)
         self._initialize_file()
 
@@ -42,59 +57,135 @@ class DFMetricsTracker:
                     'Status'
                 ])
 
+    async def start(self):
+        """Seed the running stats from rows earlier runs left in the file, then start the background writer"""
+        if self._log_task is None:
+            # Nothing recorded yet, so every row in the file predates this tracker.
+            # Parsing a long log is CPU bound, keep it off the event loop
+            seeded = await asyncio.to_thread(self._aggregate_file)
+            for operation, op_stats in seeded.items():
+                self._live_stats[operation] = [op_stats['count'], op_stats['total_time']]
+        self._ensure_flusher()
+
+    async def stop(self):
+        """Write whatever is still queued and stop the background writer"""
+        if self._log_task is None:
+            return
+        # The sentinel lets the writer finish the batch it holds instead of dropping it
+        self._log_q.put_nowait(None)
+        await self._log_task
+        self._log_task = None
+
+    def _ensure_flusher(self):
+        if self._log_task is None:
+            self._log_q = asyncio.Queue()
+            self._log_task = asyncio.get_running_loop().create_task(self._log_flusher())
+
+    def record(self, operation: DFOperation):
+        """Queue a DF operation for the background writer, never blocks"""
+        if operation.status.startswith('success'):
+            op_stats = self._live_stats.get(operation.operation)
+            if op_stats is not None:
+                op_stats[0] += 1
+                op_stats[1] += operation.response_time_ms
+        # Started on first use, callers are always inside the event loop
+        self._ensure_flusher()
+        self._log_q.put_nowait(operation)
+
     async def log_operation(self, operation: DFOperation):
         """Log a DF operation with timing data"""
-        async with self._lock:
-            async with aiofiles.open(self.output_file, 'a', newline='') as f:
-                # Standardize agent ID format
-                agent_id = operation.agent_id
-                if agent_id.lower().startswith('sala'):
-                    agent_id = f"Agent_Sala_{agent_id[4:].upper()}"
-                elif not agent_id.startswith('Agent_'):
-                    agent_id = f"Agent_{agent_id}"
-
-                row = [
-                    agent_id,
-                    operation.timestamp.isoformat(),
-                    operation.operation,
-                    f"{operation.response_time_ms:.3f}",  # Increased precision to 3 decimal places
-                    str(operation.num_results),
-                    operation.status
-                ]
-                await f.write(','.join(row) + '\n')
-
-    # TODO: Remove this because it causes an unnecessary overhead
-    def _make_hashable(self, obj):
-        """Convert a dictionary into a hashable format"""
-        if isinstance(obj, dict):
-            return frozenset((k, self._make_hashable(v)) for k, v in sorted(obj.items()))
-        elif isinstance(obj, list):
-            return tuple(self._make_hashable(elem) for elem in obj)
-        elif isinstance(obj, set):
-            return frozenset(self._make_hashable(elem) for elem in obj)
-        return obj
+        self.record(operation)
+
+    async def _log_flusher(self):
+        loop = asyncio.get_running_loop()
+        queue = self._log_q
+        while True:
+            operation = await queue.get()
+            batch = []
+            deadline = loop.time() + self.FLUSH_INTERVAL
+            # Gather up to FLUSH_BATCH_SIZE operations or FLUSH_INTERVAL seconds, None means stop
+            while operation is not None:
+                batch.append(operation)
+                if len(batch) >= self.FLUSH_BATCH_SIZE:
+                    break
+                try:
+                    operation = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+            await self.log_batch(batch)
+            if operation is None:
+                return
+
+    @staticmethod
+    def _format_row(operation: DFOperation) -> str:
+        # Standardize agent ID format
+        agent_id = operation.agent_id
+        if agent_id.lower().startswith('sala'):
+            agent_id = f"Agent_Sala_{agent_id[4:].upper()}"
+        elif not agent_id.startswith('Agent_'):
+            agent_id = f"Agent_{agent_id}"
+
+        row = [
+            agent_id,
+            operation.timestamp.isoformat(),
+            operation.operation,
+            f"{operation.response_time_ms:.3f}",  # Increased precision to 3 decimal places
+            str(operation.num_results),
+            operation.status
+        ]
+        return ','.join(row) + '\n'
+
+    async def log_batch(self, operations: List[DFOperation]):
+        """Append several DF operations with a single open and write"""
+        if not operations:
+            return
+        data = ''.join(self._format_row(op) for op in operations)
+        async with aiofiles.open(self.output_file, 'a', newline='') as f:
+            await f.write(data)
 
     def _generate_cache_key(self, agent_id: str, operation: str, params: Dict) -> str:
         """Generate a cache key from parameters"""
         try:
-            hashable_params = self._make_hashable(params)
-            return f"{agent_id}:{operation}:{hash(hashable_params)}"
+            # One C-level call for the flat param dicts DF operations use
+            return f"{agent_id}:{operation}:{json.dumps(params, sort_keys=True, default=str)}"
         except Exception:
             # Fallback if hashing fails
             return f"{agent_id}:{operation}:{datetime.now().timestamp()}"
 
+    def _shard_for(self, agent_id: str) -> OrderedDict:
+        return self._cache_shards[hash(agent_id) & (self.CACHE_SHARDS - 1)]
+
     def check_cache(self, agent_id: str, operation: str, params: Dict) -> Optional[Dict]:
         """Check if operation result is in cache"""
+        shard = self._shard_for(agent_id)
         cache_key = self._generate_cache_key(agent_id, operation, params)
-        return self._cache.get(cache_key)
+        result = shard.get(cache_key)
+        if result is not None:
+            shard.move_to_end(cache_key)
+        return result
 
     def update_cache(self, agent_id: str, operation: str, params: Dict, result: Dict):
         """Update cache with operation result"""
+        shard = self._shard_for(agent_id)
         cache_key = self._generate_cache_key(agent_id, operation, params)
-        self._cache[cache_key] = result
+        shard[cache_key] = result
+        # Bounded, the timestamp fallback keys alone would otherwise grow it forever
+        if len(shard) > self.CACHE_SIZE // self.CACHE_SHARDS:
+            shard.popitem(last=False)
 
     async def analyze_operations(self) -> Dict:
         """Analyze DF operations and generate statistics"""
+        # Seeded from the file by start() and kept current by record(), so the CSV is never re-read
+        stats = {}
+        for operation, (count, total_time) in self._live_stats.items():
+            stats[operation] = {
+                'count': count,
+                'total_time': total_time,
+                'avg_time': total_time / count if count > 0 else 0
+            }
+        return stats
+
+    def _aggregate_file(self) -> Dict:
         stats = {
             'register': {'count': 0, 'total_time': 0, 'avg_time': 0},
             'deregister': {'count': 0, 'total_time': 0, 'avg_time': 0},
@@ -102,20 +193,17 @@ class DFMetricsTracker:
             'cache_hit': {'count': 0, 'total_time': 0, 'avg_time': 0}
         }
         
-        async with aiofiles.open(self.output_file, 'r') as f:
-            lines = await f.readlines()
-            # Skip header
-            for line in lines[1:]:
-                agent_id, timestamp, operation, response_time, num_results, status = line.strip().split(',')
-                if status.startswith('success'):
-                    op_stats = stats[operation]
-                    op_stats['count'] += 1
-                    op_stats['total_time'] += float(response_time)
+        df = pd.read_csv(self.output_file, usecols=['Operation', 'ResponseTime_ms', 'Status'],
+                         dtype={'Operation': str, 'Status': str})
+        ok = df[df['Status'].str.startswith('success', na=False)]
+        grouped = ok.groupby('Operation')['ResponseTime_ms'].agg(['count', 'sum', 'mean'])
         
-        # Calculate averages
-        for op_stats in stats.values():
-            if op_stats['count'] > 0:
-                op_stats['avg_time'] = op_stats['total_time'] / op_stats['count']
+        for operation, row in grouped.iterrows():
+            op_stats = stats.get(operation)
+            if op_stats is not None:
+                op_stats['count'] = int(row['count'])
+                op_stats['total_time'] = float(row['sum'])
+                op_stats['avg_time'] = float(row['mean'])
                 
         return stats
 
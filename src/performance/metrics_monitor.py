@@ -2,6 +2,7 @@ import psutil
 import time
 import csv
 import os
+import threading
 from datetime import datetime
 import asyncio
 from typing import Dict, List, Optional, Deque
@@ -10,6 +11,11 @@ from asyncio import Lock
 import aiofiles
 
 class ActionsMonitor:
+    # One monitor per process, so there is a single writer for the metrics CSVs
+    _instance = None
+    _instance_kwargs: Optional[Dict] = None
+    _init_lock = threading.Lock()
+
     def __init__(self, output_file: str = "mas_metrics.csv", request_log_file: str = "request_metrics.csv",
                  flush_interval: int = 30, buffer_size: int = 1000, scenario: str = "small"):
         self.output_file = os.path.join("agent_output", scenario, output_file)
@@ -37,6 +43,21 @@ class ActionsMonitor:
         self.flush_task = None
         self.is_running = False
 
+    @classmethod
+    def instance(cls, **kwargs) -> 'ActionsMonitor':
+        """Shared monitor, built from the first call's arguments; later calls must pass the same ones"""
+        if cls._instance is None:
+            with cls._init_lock:
+                if cls._instance is None:
+                    monitor = cls(**kwargs)
+                    cls._instance_kwargs = kwargs
+                    cls._instance = monitor
+        if kwargs != cls._instance_kwargs:
+            raise ValueError(
+                f"ActionsMonitor already created with {cls._instance_kwargs}, got {kwargs}"
+            )
+        return cls._instance
+
     def _initialize_files(self):
         """Initialize CSV files with headers if they don't exist"""
         if not os.path.exists(self.request_log_file):